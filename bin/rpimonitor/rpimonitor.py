@@ -10,6 +10,8 @@ import argparse
 import os
 from time import sleep
 
+from rpishm import SHM_NAME, PublisherError, SamplePublisher
+
 
 # global variables
 
@@ -24,42 +26,59 @@ def get_cpu_temperature():
     return float(output[output.index(b'=') + 1:output.rindex(b"'")])
 
 
-def monitor():
+def sample():
     '''
-    Function that returns current Raspberry stats as \n delimited string.
+    Function that returns current Raspberry stats as a dict of numbers.
     '''
-    cpu_temperature = get_cpu_temperature()
-    stat = 'CPU Temperature       = {0:0.2f} C'.format(cpu_temperature)
-    cpu_usage = psutil.cpu_percent(0.1, False)
-    stat += '\nCPU Usage             = {0:0.2f} %'.format(cpu_usage)
-    stat += '\nCPU Count             = {0:0.0f}'.format(psutil.cpu_count())
     freqs = psutil.cpu_freq()
-    stat += '\nCPU Frequency Current = {0:0.2f} Hz'.format(freqs.current)
-    stat += '\nCPU Frequency Min     = {0:0.2f} Hz'.format(freqs.min)
-    stat += '\nCPU Frequency Max     = {0:0.2f} Hz'.format(freqs.max)
-    stat += '\n'
     ram = psutil.virtual_memory()
-    ram_total = ram.total / 2**20       # MiB.
-    stat += '\nRAM Total             = {0:0.2f} MB'.format(ram_total)
-    ram_used = ram.used / 2**20
-    stat += '\nRAM Used              = {0:0.2f} MB'.format(ram_used)
-    ram_free = ram.free / 2**20
-    stat += '\nRAM Free              = {0:0.2f} MB'.format(ram_free)
-    ram_available = ram.available / 2**20
-    stat += '\nRAM Available         = {0:0.2f} MB'.format(ram_available)
-    ram_percent_used = ram.percent
-    stat += '\nRAM Percent Used      = {0:0.2f} %'.format(ram_percent_used)
-    stat += '\n'
     disk = psutil.disk_usage('/')
-    disk_total = disk.total / 2**30     # GiB.
-    stat += '\nDisk Total            = {0:0.2f} GB'.format(disk_total)
-    disk_used = disk.used / 2**30
-    stat += '\nDisk Used             = {0:0.2f} GB'.format(disk_used)
-    disk_free = disk.free / 2**30
-    stat += '\nDisk Free             = {0:0.2f} GB'.format(disk_free)
-    disk_percent_used = disk.percent
-    stat += '\nDisk Percent          = {0:0.2f} %'.format(disk_percent_used)
-    
+    return {
+        'cpu_temperature': get_cpu_temperature(),
+        'cpu_usage': psutil.cpu_percent(0.1, False),
+        'cpu_count': psutil.cpu_count(),
+        'cpu_freq_current': freqs.current,
+        'cpu_freq_min': freqs.min,
+        'cpu_freq_max': freqs.max,
+        'ram_total': ram.total / 2**20,         # MiB.
+        'ram_used': ram.used / 2**20,
+        'ram_free': ram.free / 2**20,
+        'ram_available': ram.available / 2**20,
+        'ram_percent': ram.percent,
+        'disk_total': disk.total / 2**30,       # GiB.
+        'disk_used': disk.used / 2**30,
+        'disk_free': disk.free / 2**30,
+        'disk_percent': disk.percent,
+    }
+
+
+def monitor(publisher=None):
+    '''
+    Function that returns current Raspberry stats as \n delimited string,
+    the sample is also written to the shared memory publisher if supplied.
+    '''
+    values = sample()
+    if publisher is not None:
+        publisher.publish(values)
+
+    stat = 'CPU Temperature       = {0:0.2f} C'.format(values['cpu_temperature'])
+    stat += '\nCPU Usage             = {0:0.2f} %'.format(values['cpu_usage'])
+    stat += '\nCPU Count             = {0:0.0f}'.format(values['cpu_count'])
+    stat += '\nCPU Frequency Current = {0:0.2f} Hz'.format(values['cpu_freq_current'])
+    stat += '\nCPU Frequency Min     = {0:0.2f} Hz'.format(values['cpu_freq_min'])
+    stat += '\nCPU Frequency Max     = {0:0.2f} Hz'.format(values['cpu_freq_max'])
+    stat += '\n'
+    stat += '\nRAM Total             = {0:0.2f} MB'.format(values['ram_total'])
+    stat += '\nRAM Used              = {0:0.2f} MB'.format(values['ram_used'])
+    stat += '\nRAM Free              = {0:0.2f} MB'.format(values['ram_free'])
+    stat += '\nRAM Available         = {0:0.2f} MB'.format(values['ram_available'])
+    stat += '\nRAM Percent Used      = {0:0.2f} %'.format(values['ram_percent'])
+    stat += '\n'
+    stat += '\nDisk Total            = {0:0.2f} GB'.format(values['disk_total'])
+    stat += '\nDisk Used             = {0:0.2f} GB'.format(values['disk_used'])
+    stat += '\nDisk Free             = {0:0.2f} GB'.format(values['disk_free'])
+    stat += '\nDisk Percent          = {0:0.2f} %'.format(values['disk_percent'])
+
     # stat = stat.split('\n')
     # stat = [a.split('=') for a in stat]
     # mx = max([len(a[0]) for a in stat])
@@ -71,21 +90,29 @@ def monitor():
     return stat
 
 
-def main(number=-1, delay=5.0):
+def main(number=-1, delay=5.0, shm_name=SHM_NAME):
     '''
     Main script function, controls screen cleaning, refreshing and
-    printing the stats in selected manner.
+    printing the stats in selected manner. Every sample is published to
+    the shared memory segment shm_name for local consumers (see rpishm.py),
+    shm_name = None disables publishing. The segment is kept on exit, so
+    attached consumers continue with a restarted monitor.
     '''
-    i = 1
-    while (i < number) or (number == -1):
+    publisher = SamplePublisher(shm_name) if shm_name else None
+    try:
+        i = 1
+        while (i < number) or (number == -1):
+            os.system('clear')
+            stat = monitor(publisher)
+            print(stat)
+            sleep(delay)
+            i += 1
         os.system('clear')
-        stat = monitor()
+        stat = monitor(publisher)
         print(stat)
-        sleep(delay)
-        i += 1
-    os.system('clear')
-    stat = monitor()
-    print(stat)
+    finally:
+        if publisher is not None:
+            publisher.close()
 
 
 if __name__ == '__main__':
@@ -97,10 +124,17 @@ if __name__ == '__main__':
                         help='how many times the stat shall be run, default=-1 => indefinetly')
     parser.add_argument('-d', '--delay', metavar='delay', type=float, default=5.0,
                         help='delay inbetween stat refresh in seconds, default = 5.0 s')
+    parser.add_argument('-s', '--shm', metavar='name', default=SHM_NAME,
+                        help='shared memory segment the stats are published to, default = ' + SHM_NAME)
+    parser.add_argument('--no-shm', dest='shm', action='store_const', const=None,
+                        help='do not publish the stats to shared memory')
     args = parser.parse_args()
     #  print(str(args.number) + ' ' + str(args.delay))
     try:
-        main(args.number, args.delay)
+        main(args.number, args.delay, args.shm)
+    except PublisherError as e:
+        print(e)
+        print('[i] Use --shm with another name or --no-shm')
     except KeyboardInterrupt:
         pass
     finally:
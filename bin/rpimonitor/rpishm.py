@@ -0,0 +1,203 @@
+#!/usr/bin/python3
+'''
+Shared memory segment with the latest rpimonitor sample.
+
+The monitor publishes every sample into a fixed layout block guarded by
+a seqlock, local consumers (status display, watchdog, logger, ...) read the
+latest values without locking and without sampling on their own:
+
+    reader = SampleReader()
+    sample = reader.read()
+    print(sample['cpu_temperature'])
+
+The segment outlives the monitor, a restarted monitor keeps publishing into
+it. A stopped monitor therefore leaves its last sample behind, consumers
+acting on the values (e.g. a watchdog) should check its age:
+
+    if time.time() - sample['timestamp'] > 2 * delay:
+        ...  # monitor is not running
+'''
+
+# general imports
+import fcntl
+import math
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+
+# global variables
+SHM_NAME = 'rpimonitor'
+FIELDS = ('cpu_temperature', 'cpu_usage', 'cpu_count',
+          'cpu_freq_current', 'cpu_freq_min', 'cpu_freq_max',
+          'ram_total', 'ram_used', 'ram_free', 'ram_available', 'ram_percent',
+          'disk_total', 'disk_used', 'disk_free', 'disk_percent')
+# sequence number (odd while a write is in progress), timestamp, fields
+SEQUENCE = struct.Struct('<Q')
+PAYLOAD = struct.Struct('<d' + 'd' * len(FIELDS))
+SIZE = SEQUENCE.size + PAYLOAD.size
+
+
+def _attach(name, create=False, size=0):
+    '''
+    Open the segment name without registering it with the resource tracker,
+    which would remove it when the process exits. Return (segment, tracked),
+    tracked is True if the segment had to be unregistered by hand.
+    '''
+    try:
+        return shared_memory.SharedMemory(name, create, size, track=False), False
+    except TypeError:
+        # Python < 3.13 always registers the segment
+        shm = shared_memory.SharedMemory(name, create, size)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm, True
+
+
+class SeqlockError(Exception):
+    '''
+    Exception for a sample that could not be read consistently
+    '''
+    pass
+
+
+class PublisherError(Exception):
+    '''
+    Exception for a segment which already has a running publisher
+    '''
+    pass
+
+
+class SamplePublisher:
+    '''
+    Writer of the shared memory segment. The seqlock allows a single writer
+    only, so the publisher holds an exclusive lock on a lock file (with its
+    pid) for its lifetime and refuses to start while another one runs.
+    '''
+
+    def __init__(self, name=SHM_NAME, lock_dir=None):
+        self.lock_path = os.path.join(lock_dir or tempfile.gettempdir(), f'{name}.lock')
+        self.lock = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(self.lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.lock.seek(0)
+            pid = self.lock.read().strip() or '?'
+            self.lock.close()
+            raise PublisherError(f'[-] Segment {name} is already published by pid {pid}')
+        self.lock.seek(0)
+        self.lock.truncate()
+        self.lock.write(f'{os.getpid()}\n')
+        self.lock.flush()
+
+        try:
+            self.shm, self.tracked = _attach(name, create=True, size=SIZE)
+        except FileExistsError:
+            # segment of a previous run, safe to reuse with the lock held,
+            # attached readers keep reading it
+            self.shm, self.tracked = _attach(name)
+            if self.shm.size < SIZE:
+                self.shm.close()
+                self.lock.close()
+                raise
+        self.buffer = self.shm.buf
+        self.sequence = SEQUENCE.unpack_from(self.buffer, 0)[0] & ~1
+
+    def publish(self, sample, timestamp=None):
+        '''
+        Write sample (dict of FIELDS) into the segment.
+        '''
+        timestamp = time.time() if timestamp is None else timestamp
+        values = [float(value) if value is not None else math.nan
+                  for value in map(sample.get, FIELDS)]
+        SEQUENCE.pack_into(self.buffer, 0, self.sequence + 1)
+        PAYLOAD.pack_into(self.buffer, SEQUENCE.size, timestamp, *values)
+        self.sequence += 2
+        SEQUENCE.pack_into(self.buffer, 0, self.sequence)
+
+    def close(self, unlink=False):
+        '''
+        Detach from the segment, it is kept for the next publisher and the
+        attached readers unless unlink.
+        '''
+        self.buffer.release()
+        self.shm.close()
+        if unlink:
+            if self.tracked:
+                # unlink() unregisters the segment again
+                resource_tracker.register(self.shm._name, 'shared_memory')
+            self.shm.unlink()
+        # the lock file is kept, removing it would race with a new publisher
+        self.lock.close()
+
+
+class SampleReader:
+    '''
+    Lock-free reader of the shared memory segment. If the segment was
+    removed and created anew (publisher closed with unlink), the reader
+    re-attaches to the new one.
+    '''
+
+    def __init__(self, name=SHM_NAME):
+        self.name = name
+        self.shm = _attach(name)[0]
+        self.buffer = self.shm.buf
+
+    def reattach(self):
+        '''
+        Attach to the current segment if the attached one was removed,
+        return True if the reader switched segments.
+        '''
+        if os.fstat(self.shm._fd).st_nlink:
+            return False
+        try:
+            shm = _attach(self.name)[0]
+        except FileNotFoundError:
+            # no new segment yet, keep the last sample
+            return False
+        self.close()
+        self.shm, self.buffer = shm, shm.buf
+        return True
+
+    def read(self, retries=1000):
+        '''
+        Return the latest sample as dict of FIELDS with timestamp and
+        sequence, or None if nothing was published yet. Retries while the
+        writer is in the middle of an update.
+        '''
+        self.reattach()
+        for _ in range(retries):
+            before = SEQUENCE.unpack_from(self.buffer, 0)[0]
+            if not before & 1:
+                values = PAYLOAD.unpack_from(self.buffer, SEQUENCE.size)
+                if SEQUENCE.unpack_from(self.buffer, 0)[0] == before:
+                    if before == 0:
+                        return None
+                    sample = dict(zip(FIELDS, values[1:]))
+                    sample['timestamp'] = values[0]
+                    sample['sequence'] = before // 2
+                    return sample
+            # let the writer finish its update
+            time.sleep(0)
+        raise SeqlockError(f'[-] No consistent sample after {retries} retries')
+
+    def close(self):
+        self.buffer.release()
+        self.shm.close()
+
+
+if __name__ == '__main__':
+    '''
+    Print the latest published sample.
+    '''
+    reader = SampleReader()
+    try:
+        sample = reader.read()
+        if sample is None:
+            print('[i] No sample published yet')
+        else:
+            for field, value in sample.items():
+                print('{0:<17} = {1}'.format(field, value))
+    finally:
+        reader.close()
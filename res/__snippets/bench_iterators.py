@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+Benchmark of the iterator classes against their itertools fast paths, reports ns/element and memory per iterator.
+"""
+import argparse
+import gc
+import itertools
+import time
+import tracemalloc
+from collections import deque
+
+from iterators import (Infinite, InfiniteList, Fibonacci, TwoToPowerOfN,
+                       infinite_fast, infinite_list_fast, fibonacci_fast, two_to_power_of_n_fast)
+
+
+# name, class based iterator factory, fast path factory, growing values (benchmarked with fewer elements)
+CASES = [
+    ('Infinite(0, 1000, 3)', lambda: iter(Infinite(0, 1000, 3)), lambda: infinite_fast(0, 1000, 3), False),
+    ('Infinite(0, 1000, 3, False)', lambda: iter(Infinite(0, 1000, 3, False)),
+     lambda: infinite_fast(0, 1000, 3, False), False),
+    ('InfiniteList(1000, 3)', lambda: iter(InfiniteList(list(range(1000)), 3)),
+     lambda: infinite_list_fast(list(range(1000)), 3), False),
+    ('InfiniteList(1000, 3, False)', lambda: iter(InfiniteList(list(range(1000)), 3, False)),
+     lambda: infinite_list_fast(list(range(1000)), 3, False), False),
+    ('Infinite(0, 10**9, 7, False)', lambda: iter(Infinite(0, 10 ** 9, 7, False)),
+     lambda: infinite_fast(0, 10 ** 9, 7, False), False),
+    ('Fibonacci()', lambda: iter(Fibonacci()), fibonacci_fast, True),
+    ('TwoToPowerOfN()', lambda: iter(TwoToPowerOfN()), two_to_power_of_n_fast, True),
+]
+
+
+def ns_per_element(factory, n: int, repeat: int) -> float:
+    """
+    Best time to consume n elements in nanoseconds per element.
+
+    :param factory: callable returning a fresh iterator
+    :param n: number of elements
+    :param repeat: number of timings
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        iterator = factory()
+        start = time.perf_counter_ns()
+        deque(itertools.islice(iterator, n), maxlen=0)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / n
+
+
+def memory(factory, n: int) -> int:
+    """
+    Bytes held by an iterator after consuming n elements.
+
+    :param factory: callable returning a fresh iterator
+    :param n: number of elements consumed before measuring
+    """
+    gc.collect()
+    tracemalloc.start()
+    iterator = factory()
+    deque(itertools.islice(iterator, n), maxlen=0)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del iterator
+    return current
+
+
+def main(n: int = 1000000, n_growing: int = 10000, repeat: int = 5):
+    """
+    Run the benchmark and print the results.
+
+    :param n: number of elements of the cyclic iterators
+    :param n_growing: number of elements of Fibonacci and TwoToPowerOfN
+    :param repeat: number of timings
+    """
+    print(f'{"iterator":<30} {"elements":>9} {"class ns":>9} {"fast ns":>9} {"speedup":>8} '
+          f'{"class B":>9} {"fast B":>9}')
+    for name, slow, fast, growing in CASES:
+        count = n_growing if growing else n
+        slow_ns = ns_per_element(slow, count, repeat)
+        fast_ns = ns_per_element(fast, count, repeat)
+        print(f'{name:<30} {count:>9} {slow_ns:9.1f} {fast_ns:9.1f} {slow_ns / fast_ns:7.2f}x '
+              f'{memory(slow, count):>9} {memory(fast, count):>9}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=1000000,
+                        help='number of elements of the cyclic iterators, default = 1000000')
+    parser.add_argument('-g', '--growing', type=int, default=10000,
+                        help='number of elements of Fibonacci and TwoToPowerOfN, default = 10000')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='number of timings, default = 5')
+    args = parser.parse_args()
+    main(args.number, args.growing, args.repeat)
@@ -2,9 +2,283 @@
 """
 Infinite iterator from min to max by step with restart possibilities.
 """
+import itertools
+import math
+import multiprocessing
+import operator
+from collections import OrderedDict
 
+import numpy as np
 
-class Infinite:
+
+def _index(k) -> int:
+    """
+    Validate a position in an infinite sequence.
+
+    :param k: position, non-negative integer
+    """
+    k = operator.index(k)
+    if k < 0:
+        raise IndexError('infinite sequence index must be non-negative')
+    return k
+
+
+def fibonacci_pair(k: int, modulus: int = None) -> tuple:
+    """
+    (F(k), F(k + 1)) by fast doubling in O(log k) steps.
+
+    :param k: index of the Fibonacci number, F(0) = 0
+    :param modulus: if given, return the numbers modulo modulus
+    """
+    a, b = 0, 1
+    for bit in bin(k)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == '1':
+            c, d = d, c + d
+        if modulus is not None:
+            c %= modulus
+            d %= modulus
+        a, b = c, d
+    return a, b
+
+
+def _factorize(n: int) -> dict:
+    """
+    Prime factorization {prime: exponent} by trial division.
+
+    :param n: positive integer
+    """
+    factors = {}
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+        p += 1 if p == 2 else 2
+    if n > 1:
+        factors[n] = factors.get(n, 0) + 1
+    return factors
+
+
+def _divisors(n: int) -> list:
+    """
+    Sorted divisors of n.
+
+    :param n: positive integer
+    """
+    divisors = [1]
+    for p, e in _factorize(n).items():
+        divisors = [d * p ** i for d in divisors for i in range(e + 1)]
+    return sorted(divisors)
+
+
+def pisano_period(modulus: int) -> int:
+    """
+    Period of the Fibonacci sequence modulo modulus.
+
+    :param modulus: positive integer
+    """
+    if modulus == 1:
+        return 1
+    period = 1
+    for p, e in _factorize(modulus).items():
+        if p == 2:
+            prime_period = 3
+        elif p == 5:
+            prime_period = 20
+        else:
+            # pi(p) divides p - 1 for p = +-1 (mod 5) and 2 (p + 1) for p = +-2 (mod 5)
+            candidate = p - 1 if p % 5 in (1, 4) else 2 * (p + 1)
+            prime_period = next(d for d in _divisors(candidate) if fibonacci_pair(d, p) == (0, 1))
+        prime_power_period = prime_period * p ** (e - 1)
+        period = period * prime_power_period // math.gcd(period, prime_power_period)
+    return period
+
+
+class FibonacciEngine:
+    """
+    F(n) for scattered n by fast doubling with an LRU-bounded memo of (F(k), F(k + 1)) checkpoints,
+    optionally modulo a modulus. For moduli up to period_limit n is reduced by the Pisano period, which
+    shares cache entries between n and n + period. Larger moduli (e.g. 2^61 - 1) skip the reduction, as
+    factoring them by trial division is slow and fast doubling mod m is O(log n) anyway.
+    """
+    def __init__(self, modulus: int = None, cache_size: int = 128, period_limit: int = 2 ** 32):
+        """
+        :param modulus: if given, compute F(n) mod modulus
+        :param cache_size: maximal number of memoized checkpoints
+        :param period_limit: largest modulus for which the Pisano period is computed
+        """
+        self.modulus = modulus
+        self.cache_size = cache_size
+        self.period_limit = period_limit
+        self.cache = OrderedDict()
+        self._period = None
+
+    @property
+    def period(self) -> int:
+        """
+        Pisano period of the modulus, None without a modulus or for a modulus above period_limit.
+        """
+        if self.modulus is not None and self.modulus <= self.period_limit and self._period is None:
+            self._period = pisano_period(self.modulus)
+        return self._period
+
+    def pair(self, n: int) -> tuple:
+        """
+        (F(n), F(n + 1)), modulo modulus if given.
+
+        :param n: index of the Fibonacci number
+        """
+        n = _index(n)
+        if self.period is not None:
+            n %= self.period
+        if n in self.cache:
+            self.cache.move_to_end(n)
+            return self.cache[n]
+
+        # the nearest checkpoint k below n shortens the doubling to the remaining n - k steps
+        k = max((k for k in self.cache if k <= n), default=0)
+        if k and n - k < k:
+            fk, fk1 = self.cache[k]
+            fj, fj1 = fibonacci_pair(n - k, self.modulus)
+            result = (fk1 * fj + fk * (fj1 - fj), fk1 * fj1 + fk * fj)
+            if self.modulus is not None:
+                result = (result[0] % self.modulus, result[1] % self.modulus)
+        else:
+            result = fibonacci_pair(n, self.modulus)
+
+        if self.cache_size > 0:
+            self.cache[n] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
+
+    def __call__(self, n: int) -> int:
+        """
+        F(n), modulo modulus if given.
+
+        :param n: index of the Fibonacci number
+        """
+        return self.pair(n)[0]
+
+    __getitem__ = __call__
+
+
+class Partition:
+    """
+    Strided share of a cyclic sequence for one of n_workers workers: positions worker_id, worker_id + n_workers, ...
+    counted from the state of the sequence when the partition was created. Values are computed in closed form,
+    so the shards are independent and need no coordination.
+    """
+    def __init__(self, sequence, worker_id: int, n_workers: int):
+        """
+        :param sequence: Infinite or InfiniteList to partition
+        :param worker_id: index of the worker, 0 <= worker_id < n_workers
+        :param n_workers: number of workers
+        """
+        if not 0 <= worker_id < n_workers:
+            raise ValueError(f'worker_id must be in [0, {n_workers}), got {worker_id}')
+        self.sequence = sequence
+        self.start = sequence.n
+        self.worker_id = worker_id
+        self.n_workers = n_workers
+        self.k = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        result = self.sequence._value(self.start, self.worker_id + self.k * self.n_workers)
+        self.k += 1
+        return result
+
+    def next_batch(self, n: int) -> np.ndarray:
+        """
+        Next n values of the shard as a NumPy array, advances the shard by n.
+
+        :param n: number of values
+        """
+        positions = self.worker_id + (self.k + np.arange(n, dtype=np.int64)) * self.n_workers
+        self.k += n
+        return self.sequence._value(self.start, positions)
+
+
+class SharedCursor:
+    """
+    Cursor over a cyclic sequence shared by worker processes for dynamic work stealing. Workers claim chunks of
+    positions under a lock once per chunk, the values of a chunk are then computed in closed form without any
+    locking. The cursor has to be handed to the workers at process creation (Process args or Pool initializer).
+    """
+    def __init__(self, sequence, chunk: int = 1024, total: int = None):
+        """
+        :param sequence: Infinite or InfiniteList to consume
+        :param chunk: number of positions claimed at once
+        :param total: number of positions to consume, None = infinite
+        """
+        self.sequence = sequence
+        self.start = sequence.n
+        self.chunk = chunk
+        self.total = total
+        self.cursor = multiprocessing.Value('q', 0)
+
+    def claim(self):
+        """
+        Claim the next chunk of positions, return (begin, end) or None when the sequence is consumed.
+        """
+        with self.cursor.get_lock():
+            begin = self.cursor.value
+            end = begin + self.chunk
+            if self.total is not None:
+                if begin >= self.total:
+                    return None
+                end = min(end, self.total)
+            self.cursor.value = end
+        return begin, end
+
+    def next_batch(self):
+        """
+        Values of the next claimed chunk as a NumPy array or None when the sequence is consumed.
+        """
+        claimed = self.claim()
+        if claimed is None:
+            return None
+        return self.sequence._value(self.start, np.arange(*claimed, dtype=np.int64))
+
+    def __iter__(self):
+        """
+        Yield claimed chunks until the sequence is consumed.
+        """
+        batch = self.next_batch()
+        while batch is not None:
+            yield batch
+            batch = self.next_batch()
+
+
+class Partitionable:
+    """
+    Partitioning of cyclic sequences between workers.
+    """
+    def partition(self, worker_id: int, n_workers: int) -> Partition:
+        """
+        Independent iterator over every n_workers-th value starting at worker_id.
+
+        :param worker_id: index of the worker, 0 <= worker_id < n_workers
+        :param n_workers: number of workers
+        """
+        return Partition(self, worker_id, n_workers)
+
+    def shared_cursor(self, chunk: int = 1024, total: int = None) -> SharedCursor:
+        """
+        Shared cursor for dynamic work stealing between worker processes.
+
+        :param chunk: number of positions claimed at once
+        :param total: number of positions to consume, None = infinite
+        """
+        return SharedCursor(self, chunk, total)
+
+
+class Infinite(Partitionable):
     """
     Infinite iterator object over a definite sequence.
     """
@@ -20,8 +294,15 @@ class Infinite:
         self.max = max
         self.step = step
         self.from_minimum = from_minimum
+        self.n = self.min
 
     def __iter__(self):
+        return self
+
+    def reset(self) -> 'Infinite':
+        """
+        Restart the iterator at the minimum.
+        """
         self.n = self.min
         return self
 
@@ -36,8 +317,68 @@ class Infinite:
                 self.n = self.n + self.step - self.max + self.min - 1
         return result
 
+    def _advance(self, n, k):
+        """
+        Value k steps after value n computed in closed form, k can be an int or a NumPy array.
+        With from_minimum = False it matches __next__ for step <= max - min + 1.
+
+        :param n: current value
+        :param k: number of steps
+        """
+        if self.from_minimum:
+            length = (self.max - self.min) // self.step + 1
+            return self.min + ((n - self.min) // self.step + k) % length * self.step
+        size = self.max - self.min + 1
+        return self.min + (n - self.min + k * self.step) % size
+
+    _value = _advance
+
+    def __getitem__(self, k: int) -> int:
+        """
+        k-th value of the sequence counted from the start.
+
+        :param k: position
+        """
+        return self._advance(self.min, _index(k))
+
+    def skip(self, k: int) -> 'Infinite':
+        """
+        Advance the iterator by k values.
+
+        :param k: number of values to skip
+        """
+        self.n = self._advance(self.n, _index(k))
+        return self
+
+    def seek(self, k: int) -> 'Infinite':
+        """
+        Move the iterator so that next() returns the k-th value of the sequence.
+
+        :param k: position
+        """
+        self.n = self[k]
+        return self
 
-class InfiniteList:
+    def take(self, n: int) -> np.ndarray:
+        """
+        Next n values as a NumPy array computed in closed form, does not advance the iterator.
+
+        :param n: number of values
+        """
+        return self._advance(self.n, np.arange(n, dtype=np.int64))
+
+    def next_batch(self, n: int) -> np.ndarray:
+        """
+        Next n values as a NumPy array, advances the iterator by n.
+
+        :param n: number of values
+        """
+        values = self.take(n + 1)
+        self.n = int(values[-1])
+        return values[:-1]
+
+
+class InfiniteList(Partitionable):
     """
     Infinite iterator object over a supplied list.
     """
@@ -52,8 +393,15 @@ class InfiniteList:
         self.length = len(self.iter_list)
         self.step = step
         self.from_start = from_start
+        self.n = 0
 
     def __iter__(self):
+        return self
+
+    def reset(self) -> 'InfiniteList':
+        """
+        Restart the iterator at the start of the list.
+        """
         self.n = 0
         return self
 
@@ -68,6 +416,83 @@ class InfiniteList:
                 self.n = self.n + self.step - self.length
         return result
 
+    def _advance(self, n, k):
+        """
+        Index in iter_list k steps after index n computed in closed form, k can be an int or a NumPy array.
+        With from_start = False it matches __next__ for step <= length.
+
+        :param n: current index
+        :param k: number of steps
+        """
+        if self.from_start:
+            length = (self.length - 1) // self.step + 1
+            return (n // self.step + k) % length * self.step
+        return (n + k * self.step) % self.length
+
+    def _value(self, n, k):
+        """
+        Value k steps after index n, k can be an int or a NumPy array.
+
+        :param n: current index
+        :param k: number of steps
+        """
+        index = self._advance(n, k)
+        if isinstance(index, np.ndarray):
+            return np.asarray(self.iter_list)[index]
+        return self.iter_list[index]
+
+    def _indices(self, n: int) -> np.ndarray:
+        """
+        Indices of the next n values in iter_list.
+
+        :param n: number of indices
+        """
+        return self._advance(self.n, np.arange(n, dtype=np.int64))
+
+    def __getitem__(self, k: int):
+        """
+        k-th value of the sequence counted from the start.
+
+        :param k: position
+        """
+        return self.iter_list[self._advance(0, _index(k))]
+
+    def skip(self, k: int) -> 'InfiniteList':
+        """
+        Advance the iterator by k values.
+
+        :param k: number of values to skip
+        """
+        self.n = self._advance(self.n, _index(k))
+        return self
+
+    def seek(self, k: int) -> 'InfiniteList':
+        """
+        Move the iterator so that next() returns the k-th value of the sequence.
+
+        :param k: position
+        """
+        self.n = self._advance(0, _index(k))
+        return self
+
+    def take(self, n: int) -> np.ndarray:
+        """
+        Next n values as a NumPy array, does not advance the iterator.
+
+        :param n: number of values
+        """
+        return np.asarray(self.iter_list)[self._indices(n)]
+
+    def next_batch(self, n: int) -> np.ndarray:
+        """
+        Next n values as a NumPy array, advances the iterator by n.
+
+        :param n: number of values
+        """
+        indices = self._indices(n + 1)
+        self.n = int(indices[-1])
+        return np.asarray(self.iter_list)[indices[:-1]]
+
 
 class Fibonacci:
     """
@@ -79,8 +504,15 @@ class Fibonacci:
         :return:
         """
         self.number = number
+        self.reset()
 
-    def __iter__(self, number: int = -1):
+    def __iter__(self):
+        return self
+
+    def reset(self) -> 'Fibonacci':
+        """
+        Restart the iterator at F(0).
+        """
         self.n = 0
         self.m = 1
         self.c = 0
@@ -88,13 +520,50 @@ class Fibonacci:
 
     def __next__(self):
         self.c += 1
-        if self.c == self.number:
+        if 0 < self.number <= self.c:
             raise StopIteration
         fib = self.n
         self.n = self.m
         self.m += fib
         return fib
 
+    def _check(self, k: int) -> int:
+        """
+        Validate position k against the number of returned values.
+
+        :param k: position
+        """
+        k = _index(k)
+        if self.number > 0 and k >= self.number - 1:
+            raise IndexError('Fibonacci index out of range')
+        return k
+
+    def __getitem__(self, k: int) -> int:
+        """
+        k-th Fibonacci number by fast doubling.
+
+        :param k: position
+        """
+        return fibonacci_pair(self._check(k))[0]
+
+    def seek(self, k: int) -> 'Fibonacci':
+        """
+        Move the iterator so that next() returns the k-th Fibonacci number.
+
+        :param k: position
+        """
+        self.c = self._check(k)
+        self.n, self.m = fibonacci_pair(self.c)
+        return self
+
+    def skip(self, k: int) -> 'Fibonacci':
+        """
+        Advance the iterator by k values.
+
+        :param k: number of values to skip
+        """
+        return self.seek(self.c + _index(k))
+
 
 class TwoToPowerOfN:
     """
@@ -106,20 +575,174 @@ class TwoToPowerOfN:
         :return:
         """
         self.number = number
+        self.reset()
+
+    def __iter__(self):
+        return self
 
-    def __iter__(self, number: int = -1):
+    def reset(self) -> 'TwoToPowerOfN':
+        """
+        Restart the iterator at 2^0.
+        """
         self.n = 0
         self.c = 0
+        self.two = 1
         return self
 
     def __next__(self):
         self.c += 1
-        if self.c == self.number:
+        if 0 < self.number <= self.c:
             raise StopIteration
-        two = 2 ** self.n
+        two = self.two
+        self.two <<= 1
         self.n += 1
         return two
 
+    def _check(self, k: int) -> int:
+        """
+        Validate position k against the number of returned values.
+
+        :param k: position
+        """
+        k = _index(k)
+        if self.number > 0 and k >= self.number - 1:
+            raise IndexError('TwoToPowerOfN index out of range')
+        return k
+
+    def __getitem__(self, k: int) -> int:
+        """
+        k-th power of two by bit shift.
+
+        :param k: position
+        """
+        return 1 << self._check(k)
+
+    def seek(self, k: int) -> 'TwoToPowerOfN':
+        """
+        Move the iterator so that next() returns 2^k.
+
+        :param k: position
+        """
+        self.n = self.c = self._check(k)
+        self.two = 1 << self.n
+        return self
+
+    def skip(self, k: int) -> 'TwoToPowerOfN':
+        """
+        Advance the iterator by k values.
+
+        :param k: number of values to skip
+        """
+        return self.seek(self.c + _index(k))
+
+
+# itertools fast paths, same values as the iterator classes above
+# periods up to _MAX_CYCLE values are cached by itertools.cycle, longer ones are chained from lazy runs
+_MAX_CYCLE = 2 ** 16
+_MAX_RUNS = 2 ** 16
+
+
+def _run_starts(size: int, step: int) -> list:
+    """
+    Offsets at which the runs of one period of the wrapping sequence (0, step, 2 step, ...) mod size start,
+    every run ascends by step until it passes size. There are step / gcd(step, size) runs.
+
+    :param size: number of positions, step <= size
+    :param step: step between two values
+    """
+    starts = []
+    start = 0
+    while True:
+        starts.append(start)
+        start += ((size - 1 - start) // step + 1) * step - size
+        if start == 0:
+            return starts
+
+
+def infinite_fast(min: int = 1, max: int = 5, step: int = 1, from_minimum: bool = True):
+    """
+    Same sequence as Infinite, a short period is cycled, a long one chained from range objects, one per run
+    between two wrap-arounds, so the memory does not grow with max - min.
+
+    :param min: start of the iterator
+    :param max: upper bound of the iterator
+    :param step: step between two values
+    :param from_minimum: when the maximum is reached continue from minimum?
+    """
+    size = max - min + 1
+    if size < 1 or (not from_minimum and (step > size or step // math.gcd(step, size) > _MAX_RUNS)):
+        # no wrap-around period or too many runs, leave it to the plain iterator
+        return iter(Infinite(min, max, step, from_minimum))
+    if from_minimum:
+        period = range(min, max + 1, step)
+        if len(period) <= _MAX_CYCLE:
+            return itertools.cycle(period)
+        return itertools.chain.from_iterable(itertools.repeat(period))
+    runs = [range(min + start, max + 1, step) for start in _run_starts(size, step)]
+    if size // math.gcd(step, size) <= _MAX_CYCLE:
+        return itertools.cycle(itertools.chain.from_iterable(runs))
+    return itertools.chain.from_iterable(itertools.cycle(runs))
+
+
+def infinite_list_fast(iter_list: list, step: int = 1, from_start: bool = True):
+    """
+    Same sequence as InfiniteList, a short period is cycled, a long one chained from islice views of iter_list,
+    one per run between two wrap-arounds, so the list is not copied.
+
+    :param iter_list: list of values to iterate over
+    :param step: step between two values
+    :param from_start: when the end of list is reached continue from start?
+    """
+    length = len(iter_list)
+    if not from_start and (step > length or step // math.gcd(step, length) > _MAX_RUNS):
+        return iter(InfiniteList(iter_list, step, from_start))
+    starts = [0] if from_start else _run_starts(length, step)
+    runs = (itertools.islice(iter_list, start, None, step) for start in starts)
+    if (-(-length // step) if from_start else length // math.gcd(step, length)) <= _MAX_CYCLE:
+        return itertools.cycle(itertools.chain.from_iterable(runs))
+    return itertools.chain.from_iterable(itertools.islice(iter_list, start, None, step)
+                                         for start in itertools.cycle(starts))
+
+
+def _limit(iterator, number: int):
+    """
+    Apply the number convention of Fibonacci and TwoToPowerOfN: number - 1 values if number > 0.
+
+    :param iterator: infinite iterator
+    :param number: the number of numbers to return. if number = -1, then infinite
+    """
+    if number > 0:
+        return itertools.islice(iterator, number - 1)
+    return iterator
+
+
+def _fibonacci():
+    """
+    Fibonacci numbers from a generator, the pair lives in local variables.
+    """
+    a, b = 0, 1
+    while True:
+        yield a
+        a, b = b, a + b
+
+
+def fibonacci_fast(number: int = -1):
+    """
+    Same sequence as Fibonacci from a plain generator, no itertools combination beats two local additions.
+
+    :param number: the number of Fibonacci numbers to return. if number = -1, then infinite
+    """
+    return _limit(_fibonacci(), number)
+
+
+def two_to_power_of_n_fast(number: int = -1):
+    """
+    Same sequence as TwoToPowerOfN built from itertools.accumulate doubling the previous value.
+
+    :param number: the number of numbers to return. if number = -1, then infinite
+    """
+    return _limit(itertools.accumulate(itertools.repeat(2), operator.mul, initial=1), number)
+
 
 # test
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+#!/usr/local/bin/python3.7
+'''
+Throughput benchmark of the Bluetoothctl wrapper against fake_bluetoothctl.py,
+reports commands per second, p50/p99 command latency and parse cost for each
+public method.
+'''
+
+# <-------------------------------------------------------------- global imports --->
+import argparse
+import os
+import sys
+import time
+
+from bluetoothctl import Bluetoothctl, parse_info_lines, parse_device_line
+
+
+# <------------------------------------------------------------ global variables --->
+FAKE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_bluetoothctl.py')
+DEVICE = '00:00:00:00:00:01'
+CONTROLLER = '00:1A:7D:DA:71:13'
+
+# method name, arguments, raw command, parser of the raw output lines
+METHODS = [
+    ('get_version', (), 'version', None),
+    ('list_controllers', (), 'list', lambda bl, out: [bl.parse_controller(line) for line in out]),
+    ('get_controller_info', (), 'show', lambda bl, out: parse_info_lines(out)),
+    ('select_controller', (CONTROLLER,), f'select {CONTROLLER}', None),
+    ('get_available_devices', (), 'devices', lambda bl, out: [parse_device_line(line) for line in out]),
+    ('get_paired_devices', (), 'paired-devices', lambda bl, out: [parse_device_line(line) for line in out]),
+    ('get_discoverable_devices', (), None, None),
+    ('get_device_changes', (), None, None),
+    ('get_device_info', (DEVICE,), f'info {DEVICE}', lambda bl, out: parse_info_lines(out)),
+    ('is_connected', (DEVICE,), None, None),
+    ('scan_on', (), None, None),
+    ('scan_off', (), None, None),
+    ('power_on', (), None, None),
+    ('pairable_on', (), None, None),
+    ('discoverable_off', (), None, None),
+    ('pair', (DEVICE,), None, None),
+    ('trust', (DEVICE,), None, None),
+    ('untrust', (DEVICE,), None, None),
+    ('block', (DEVICE,), None, None),
+    ('unblock', (DEVICE,), None, None),
+    ('connect', (DEVICE,), None, None),
+    ('disconnect', (DEVICE,), None, None),
+    ('remove', (DEVICE,), None, None),
+]
+
+
+# <--------------------------------------------------------- main body of module --->
+def percentile(values, p):
+    '''
+    Return p-th percentile of sorted values (nearest rank)
+    '''
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+def bench_method(bl, method, args, command, parser, number):
+    '''
+    Time number calls of method, return dict of stats
+    '''
+    func = getattr(bl, method)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(number):
+        t = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    latencies.sort()
+
+    parse = None
+    if parser is not None:
+        out = bl.get_output(command)
+        t = time.perf_counter()
+        for _ in range(number):
+            parser(bl, out)
+        parse = (time.perf_counter() - t) / number
+
+    return {'cps': number / total, 'p50': percentile(latencies, 50),
+            'p99': percentile(latencies, 99), 'parse': parse}
+
+
+def main(number=200, fake_args='', delaybeforesend=0.05):
+    '''
+    Run the benchmark against a fake bluetoothctl and print the results,
+    delaybeforesend is the pexpect pause before every send (0.05 s by default)
+    '''
+    bl = Bluetoothctl(f'{sys.executable} {FAKE} {fake_args}')
+    bl.child.timeout = 5
+    bl.child.delaybeforesend = delaybeforesend or None
+    print(f'[+] {number} calls per method, delaybeforesend {delaybeforesend} s, '
+          f'fake_bluetoothctl {fake_args}')
+    print(f'{"method":<26} {"cmd/s":>10} {"p50 ms":>10} {"p99 ms":>10} {"parse us":>10}')
+    try:
+        for method, args, command, parser in METHODS:
+            stats = bench_method(bl, method, args, command, parser, number)
+            parse = f'{stats["parse"] * 1e6:10.2f}' if stats['parse'] is not None else f'{"-":>10}'
+            print(f'{method:<26} {stats["cps"]:10.1f} {stats["p50"] * 1e3:10.3f} '
+                  f'{stats["p99"] * 1e3:10.3f} {parse}')
+    finally:
+        bl.close()
+
+
+# <-------------------------------------------------------------------- solo run --->
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--number', type=int, default=200,
+                        help='number of calls per method, default = 200')
+    parser.add_argument('-f', '--fake-args', default='--devices 200 --paired 20',
+                        help='arguments of fake_bluetoothctl.py, default = "--devices 200 --paired 20"')
+    parser.add_argument('-s', '--send-delay', type=float, default=0.05,
+                        help='pexpect delaybeforesend in seconds, default = 0.05')
+    args = parser.parse_args()
+    main(args.number, args.fake_args, args.send_delay)
@@ -0,0 +1,140 @@
+#!/usr/local/bin/python3.7
+'''
+Benchmark of the single-pass bluetoothctl parser against the original
+split based parser over large synthetic info/devices captures.
+'''
+
+# <-------------------------------------------------------------- global imports --->
+import argparse
+import timeit
+
+from bluetoothctl import parse_info_lines, parse_device_line
+
+
+# <------------------------------------------------------------ global variables --->
+UUIDS = [('Generic Access Profile', '00001800-0000-1000-8000-00805f9b34fb'),
+         ('Generic Attribute Profile', '00001801-0000-1000-8000-00805f9b34fb'),
+         ('A/V Remote Control', '0000110e-0000-1000-8000-00805f9b34fb'),
+         ('Audio Sink', '0000110b-0000-1000-8000-00805f9b34fb'),
+         ('Handsfree', '0000111e-0000-1000-8000-00805f9b34fb')]
+
+
+# <--------------------------------------------------------- main body of module --->
+def mac(i):
+    '''
+    Generate a mac address from an integer
+    '''
+    return ':'.join(f'{(i >> (8 * b)) & 0xff:02X}' for b in range(5, -1, -1))
+
+
+def info_capture(n_uuids=200):
+    '''
+    Generate a device info capture with n_uuids UUID lines
+    '''
+    lines = [f'Device {mac(1)} (public)',
+             '\tName: Benchmark Headset',
+             '\tAlias: Benchmark Headset',
+             '\tClass: 0x00240404',
+             '\tIcon: audio-card',
+             '\tPaired: yes',
+             '\tTrusted: yes',
+             '\tBlocked: no',
+             '\tConnected: yes',
+             '\tLegacyPairing: no']
+    for i in range(n_uuids):
+        name, uuid = UUIDS[i % len(UUIDS)]
+        lines.append(f'\tUUID: {name} {i:<20}({uuid})')
+    lines.append('\tModalias: bluetooth:v000Ap4A60d0100')
+
+    return lines
+
+
+def devices_capture(n_devices=1000):
+    '''
+    Generate a devices listing capture with n_devices lines
+    '''
+    return [f'Device {mac(i)} Device number {i}' for i in range(n_devices)]
+
+
+def legacy_parse_info(info_string):
+    '''
+    Original parse_info implementation
+    '''
+    info = {}
+    info['UUID'] = {}
+    for line in info_string:
+        line = line.strip()
+        if 'not available' in line:
+            return None
+        if line.split(' ')[0].strip() in ['Controller', 'Device']:
+            info.setdefault(line.split(' ')[0].strip(), line.split(' ')[1])
+        elif line.startswith('UUID:'):
+            tmp = line.split(':', 2)[1]
+            info['UUID'].setdefault(tmp.split('(')[0].strip(), tmp.split('(')[1].strip(')'))
+        else:
+            info.setdefault(line.split(':', 1)[0].strip(), line.split(':', 1)[1].strip())
+
+    return info
+
+
+def legacy_parse_device_info(info_string):
+    '''
+    Original parse_device_info implementation
+    '''
+    device = {}
+    block_list = ['removed']
+    string_valid = not any(keyword in info_string for keyword in block_list)
+
+    if string_valid:
+        try:
+            device_position = info_string.index('Device')
+        except ValueError:
+            pass
+        else:
+            if device_position > -1:
+                attribute_list = info_string[device_position:].split(' ', 2)
+                device = {'mac_address': attribute_list[1], 'name': attribute_list[2]}
+
+    return device
+
+
+def bench(label, func, number, repeat):
+    '''
+    Time func and print the best time per call
+    '''
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f'{label:<40} {best * 1e6:10.2f} us')
+
+    return best
+
+
+def main(n_uuids=200, n_devices=1000, number=100, repeat=5):
+    '''
+    Run the benchmark and print the results
+    '''
+    info = info_capture(n_uuids)
+    devices = devices_capture(n_devices)
+
+    print(f'[+] info capture: {len(info)} lines, devices capture: {len(devices)} lines')
+    old = bench('legacy parse_info', lambda: legacy_parse_info(info), number, repeat)
+    new = bench('parse_info_lines', lambda: parse_info_lines(info), number, repeat)
+    print(f'{"speedup":<40} {old / new:10.2f} x')
+
+    old = bench('legacy parse_device_info',
+                lambda: [legacy_parse_device_info(line) for line in devices], number, repeat)
+    new = bench('parse_device_line',
+                lambda: [parse_device_line(line) for line in devices], number, repeat)
+    print(f'{"speedup":<40} {old / new:10.2f} x')
+
+
+# <-------------------------------------------------------------------- solo run --->
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-u', '--uuids', type=int, default=200,
+                        help='number of UUID lines in info capture, default = 200')
+    parser.add_argument('-d', '--devices', type=int, default=1000,
+                        help='number of lines in devices capture, default = 1000')
+    parser.add_argument('-n', '--number', type=int, default=100,
+                        help='number of calls per timing, default = 100')
+    args = parser.parse_args()
+    main(args.uuids, args.devices, args.number)
@@ -9,10 +9,26 @@ import pexpect
 import subprocess
 import sys
 import re
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 
 # <------------------------------------------------------------ global variables --->
 BLOCK = '[\x1b[0;92mNEW\x1b[0m]'
+PROVISION = ('pair', 'trust', 'connect')
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]|[\x01\x02]')
+DEVICE_RE = re.compile(r'\s*(?:\[NEW\]\s*)?Device ([0-9A-Fa-f:]{17}) (.*)')
+INFO_RE = re.compile(r'\s*(?:(Controller|Device) ([0-9A-Fa-f:]{17})'
+                     r'|UUID: ([^(]*)\(([^)]*)\)'
+                     r'|([^:]+): (.*))')
+SCAN_RE = re.compile(r'\s*\[(NEW|CHG|DEL)\]\s*Device ([0-9A-Fa-f:]{17}) '
+                     r'(?:RSSI: (?:0x[0-9a-fA-F]+ \()?(-?\d+)\)?'
+                     r'|ManufacturerData Key: (\S+)'
+                     r'|ManufacturerData Value:\s*(?:0x)?([0-9a-fA-F ]*)'
+                     r'|(.*))')
+HEXDUMP_RE = re.compile(r'\s+((?:[0-9a-fA-F]{2} )+)')
+PROMPT_RE = re.compile(r'\[[^\]\r\n]*\]# ')
 
 
 # <--------------------------------------------------------- main body of module --->
@@ -23,17 +39,186 @@ class BluetoothctlError(Exception):
     pass
 
 
+class Device:
+    '''
+    Device record from bluetoothctl device listing
+    '''
+    __slots__ = ('mac_address', 'name')
+
+    def __init__(self, mac_address, name):
+        self.mac_address = mac_address
+        self.name = name
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Device):
+            return NotImplemented
+        return self.mac_address == other.mac_address and self.name == other.name
+
+    def __hash__(self):
+        return hash((self.mac_address, self.name))
+
+    def __repr__(self):
+        return f'Device({self.mac_address!r}, {self.name!r})'
+
+
+class Info:
+    '''
+    Controller or device info record, raw properties are kept in properties dict
+    and UUIDs in uuids dict as {name: uuid}. The record also reads like the dict
+    returned by the original parser, keyed by the bluetoothctl property name
+    (e.g. info['Connected'], 'Connected' in info, info.items()) with the
+    'UUID' and 'Controller'/'Device' keys.
+    '''
+    __slots__ = ('mac_address', 'name', 'alias', 'properties', 'uuids')
+    kind = None
+    flags = ()
+
+    def __init__(self, mac_address, properties, uuids):
+        self.mac_address = mac_address
+        self.name = properties.get('Name')
+        self.alias = properties.get('Alias')
+        self.properties = properties
+        self.uuids = uuids
+        for flag in self.flags:
+            setattr(self, flag.lower(), properties.get(flag) == 'yes')
+
+    def __getitem__(self, key):
+        if key == self.kind and self.mac_address is not None:
+            return self.mac_address
+        if key == 'UUID':
+            return self.uuids
+        return self.properties[key]
+
+    def __contains__(self, key):
+        return (key == 'UUID' or key in self.properties
+                or (key == self.kind and self.mac_address is not None))
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        keys = ['UUID']
+        if self.mac_address is not None:
+            keys.append(self.kind)
+        keys.extend(key for key in self.properties if key != self.kind)
+        return keys
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.mac_address!r}, {self.name!r})'
+
+
+class ControllerInfo(Info):
+    '''
+    Controller info record
+    '''
+    __slots__ = ('powered', 'discoverable', 'pairable', 'discovering')
+    kind = 'Controller'
+    flags = ('Powered', 'Discoverable', 'Pairable', 'Discovering')
+
+
+class DeviceInfo(Info):
+    '''
+    Device info record
+    '''
+    __slots__ = ('paired', 'trusted', 'blocked', 'connected')
+    kind = 'Device'
+    flags = ('Paired', 'Trusted', 'Blocked', 'Connected')
+
+
+INFO_RECORDS = {'Controller': ControllerInfo, 'Device': DeviceInfo}
+
+
+def parse_info_lines(lines):
+    '''
+    Parse lines of bluetoothctl show/info output in a single pass, return
+    ControllerInfo/DeviceInfo record or None if not available.
+    '''
+    kind = mac_address = None
+    properties = {}
+    uuids = {}
+    match_line = INFO_RE.match
+    for line in lines:
+        if '\x1b' in line:
+            line = ANSI_RE.sub('', line)
+        if 'not available' in line:
+            return None
+        match = match_line(line)
+        if match is None:
+            continue
+        record, mac, uuid_name, uuid, key, value = match.groups()
+        if record:
+            if kind is None:
+                kind, mac_address = record, mac
+        elif uuid is not None:
+            uuids.setdefault(uuid_name.rstrip(), uuid)
+        else:
+            key = key.lstrip()
+            # skip [NEW]/[CHG]/[DEL] event lines interleaved with the output
+            if not key.startswith('['):
+                properties.setdefault(key, value.rstrip())
+
+    return INFO_RECORDS.get(kind, DeviceInfo)(mac_address, properties, uuids)
+
+
+def parse_device_line(line):
+    '''
+    Parse a line of bluetoothctl device listing, return Device record or None.
+    '''
+    if '\x1b' in line:
+        line = ANSI_RE.sub('', line)
+    if 'removed' in line:
+        return None
+    match = DEVICE_RE.match(line)
+    if match is None:
+        return None
+
+    return Device(match.group(1), match.group(2))
+
+
 class Bluetoothctl:
     '''
     Class wrapper for bluetoothctl command on linux
     '''
 
 
-    def __init__(self):
+    def __init__(self, command='bluetoothctl'):
+        '''
+        Create a bluetoothctl process in background, command can point to
+        a replacement executable (e.g. fake_bluetoothctl.py for testing)
+        '''
+        self.child = pexpect.spawn(command, echo=False)
+        self._last_devices = {}
+
+
+    def close(self):
         '''
-        Create a bluetoothctl process in background
+        Quit bluetoothctl and terminate the background process
         '''
-        self.child = pexpect.spawn('bluetoothctl', echo=False)
+        if self.child.isalive():
+            try:
+                self.child.send(b'quit\r\n')
+                self.child.expect(pexpect.EOF, timeout=1)
+            except (pexpect.TIMEOUT, OSError):
+                pass
+        self.child.close(force=True)
 
 
     def get_output(self, command='help', pause=0):
@@ -52,6 +237,27 @@ class Bluetoothctl:
         return [o for o in out if not BLOCK in o]
 
 
+    def get_outputs(self, commands, pause=0):
+        '''
+        Run several commands in bluetoothctl prompt in a single write and return
+        their outputs as a list of lists of lines (one list per command).
+        '''
+        self.child.send(''.join(f'{command}\r\n' for command in commands).encode('ascii'))
+        time.sleep(pause)
+
+        outputs = []
+        for command in commands:
+            start_failed = self.child.expect(['#', pexpect.EOF])
+
+            if start_failed:
+                raise BluetoothctlError('[-] Bluetoothctl failed after running ' + command)
+
+            out = self.child.before.decode('ascii').split('\r\n')[:-1]
+            outputs.append([o for o in out if not BLOCK in o])
+
+        return outputs
+
+
     def scan_on(self):
         '''
         Start bluetooth scanning process
@@ -185,21 +391,7 @@ class Bluetoothctl:
         '''
         Parse controller or device info
         '''
-        info = {}
-        info['UUID'] = {}
-        for line in info_string:
-            line = line.strip()
-            if 'not available' in line:
-                return None
-            if line.split(' ')[0].strip() in ['Controller', 'Device']:
-                info.setdefault(line.split(' ')[0].strip(), line.split(' ')[1])
-            elif line.startswith('UUID:'):
-                tmp = line.split(':', 2)[1]
-                info['UUID'].setdefault(tmp.split('(')[0].strip(), tmp.split('(')[1].strip(')'))
-            else:
-                info.setdefault(line.split(':', 1)[0].strip(), line.split(':', 1)[1].strip())
-
-        return info
+        return parse_info_lines(info_string)
 
 
     def get_controller_info(self, mac_address=''):
@@ -222,34 +414,22 @@ class Bluetoothctl:
 
     def select_controller(self, mac_address):
         '''
-        Select default bluetooth controller by mac address
+        Select default bluetooth controller by mac address, return success of the operation.
         '''
         try:
             out = self.get_output(f'select {mac_address}')
         except BluetoothctlError as e:
             print(e)
             return None
+        else:
+            return not any('not available' in line for line in out)
 
 
     def parse_device_info(self, info_string):
         '''
         Parse a string corresponding to a device.
         '''
-        device = {}
-        block_list = ['removed']
-        string_valid = not any(keyword in info_string for keyword in block_list)
-
-        if string_valid:
-            try:
-                device_position = info_string.index('Device')
-            except ValueError:
-                pass
-            else:
-                if device_position > -1:
-                    attribute_list = info_string[device_position:].split(' ', 2)
-                    device = {'mac_address': attribute_list[1], 'name': attribute_list[2]}
-
-        return device
+        return parse_device_line(info_string)
 
 
     def get_available_devices(self):
@@ -292,14 +472,60 @@ class Bluetoothctl:
             return paired_devices
 
 
+    def parse_devices(self, lines):
+        '''
+        Parse device listing lines into a dict of devices indexed by mac address.
+        '''
+        devices = {}
+        for line in lines:
+            device = self.parse_device_info(line)
+            if device:
+                devices[device.mac_address] = device
+
+        return devices
+
+
+    def get_device_index(self):
+        '''
+        Return a tuple of (available, paired) dicts of devices indexed by mac address,
+        both listings are fetched in one exchange with bluetoothctl.
+        '''
+        try:
+            available, paired = self.get_outputs(['devices', 'paired-devices'])
+        except BluetoothctlError as e:
+            print(e)
+            return None
+        else:
+            return self.parse_devices(available), self.parse_devices(paired)
+
+
     def get_discoverable_devices(self):
         '''
-        Filter paired devices out of available .
+        Filter paired devices out of available.
         '''
-        available = self.get_available_devices()
-        paired = self.get_paired_devices()
+        index = self.get_device_index()
+        if index is None:
+            return None
+        available, paired = index
 
-        return [d for d in available if d not in paired]
+        return [d for mac, d in available.items() if mac not in paired]
+
+
+    def get_device_changes(self):
+        '''
+        Return devices added, removed and changed (e.g. renamed) since the last call
+        as a dict of lists. The first call reports all available devices as added.
+        '''
+        index = self.get_device_index()
+        if index is None:
+            return None
+        current = index[0]
+        last = self._last_devices
+        self._last_devices = current
+
+        return {'added': [d for mac, d in current.items() if mac not in last],
+                'removed': [d for mac, d in last.items() if mac not in current],
+                'changed': [d for mac, d in current.items() if mac in last and last[mac] != d]}
 
 
     def get_device_info(self, mac_address=''):
@@ -475,13 +701,516 @@ class Bluetoothctl:
             return False
         else:
             if device:
-                connected = True if device['Connected'] == 'yes' else False
+                connected = device.get('Connected') == 'yes'
             else:
                 connected = False
             
             return connected
 
 
+class ScanUpdate:
+    '''
+    Advertisement update of one device emitted by ScanCollector
+    '''
+    __slots__ = ('mac_address', 'name', 'rssi', 'manufacturer_data', 'timestamp')
+
+    def __init__(self, mac_address, name, rssi, manufacturer_data, timestamp):
+        self.mac_address = mac_address
+        self.name = name
+        self.rssi = rssi
+        self.manufacturer_data = manufacturer_data
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f'ScanUpdate({self.mac_address!r}, {self.name!r}, rssi={self.rssi})'
+
+
+class ScanDevice:
+    '''
+    Scan state of one device, rssi is a bounded ring of recent readings, dump
+    collects a manufacturer data hex dump until it is complete and dirty marks
+    a change which was not emitted yet
+    '''
+    __slots__ = ('mac_address', 'name', 'rssi', 'manufacturer_data', 'manufacturer_key',
+                 'last_seen', 'last_emitted', 'dump', 'dirty')
+
+    def __init__(self, mac_address, history):
+        self.mac_address = mac_address
+        self.name = None
+        self.rssi = deque(maxlen=history)
+        self.manufacturer_data = {}
+        self.manufacturer_key = None
+        self.last_seen = 0.0
+        self.last_emitted = float('-inf')
+        self.dump = None
+        self.dirty = False
+
+
+class ScanCollector:
+    '''
+    Collect RSSI and manufacturer data updates from bluetoothctl while scanning.
+    Updates that do not change the state of a device are dropped, at most one
+    update per device is emitted every interval seconds, changes arriving
+    within the interval are emitted with the latest state once it expires.
+    Only the last history RSSI readings of at most max_devices devices are
+    kept. Consumers either subscribe a callback or iterate over the collector.
+    '''
+
+
+    def __init__(self, bluetoothctl, interval=1.0, history=16, max_devices=1024):
+        '''
+        :param bluetoothctl: Bluetoothctl session used for scanning
+        :param interval: minimal time between two updates of one device in seconds
+        :param history: number of RSSI readings kept per device
+        :param max_devices: number of devices kept, least recently seen are dropped
+        '''
+        self.bluetoothctl = bluetoothctl
+        self.interval = interval
+        self.history = history
+        self.max_devices = max_devices
+        self.devices = OrderedDict()
+        self.callbacks = []
+        self._dirty = {}
+        self._dump_device = None
+
+
+    def subscribe(self, callback):
+        '''
+        Call callback(ScanUpdate) for every emitted update
+        '''
+        self.callbacks.append(callback)
+
+
+    def unsubscribe(self, callback):
+        '''
+        Stop calling callback
+        '''
+        self.callbacks.remove(callback)
+
+
+    def device(self, mac_address):
+        '''
+        Return scan state of mac_address, create it if not seen yet
+        '''
+        device = self.devices.get(mac_address)
+        if device is None:
+            device = self.devices[mac_address] = ScanDevice(mac_address, self.history)
+            if len(self.devices) > self.max_devices:
+                self._forget(self.devices.popitem(last=False)[1])
+        else:
+            self.devices.move_to_end(mac_address)
+
+        return device
+
+
+    def _forget(self, device):
+        self._dirty.pop(device.mac_address, None)
+        if self._dump_device is device:
+            self._dump_device = None
+
+
+    def feed(self, line, now=None):
+        '''
+        Parse one line of bluetoothctl scan output, return list of ScanUpdates
+        emitted after it.
+        '''
+        if '\x1b' in line:
+            line = ANSI_RE.sub('', line)
+        # bluetoothctl redraws its prompt after every event, so an event line
+        # arrives as <prompt>\r\x1b[K<event>, keep only the event
+        if '\r' in line:
+            line = line.rpartition('\r')[2]
+        prompt = PROMPT_RE.match(line)
+        if prompt is not None:
+            line = line[prompt.end():]
+        if not line.strip():
+            return []
+        now = time.monotonic() if now is None else now
+
+        match = SCAN_RE.match(line)
+        if match is None:
+            match = HEXDUMP_RE.match(line)
+            if match is not None and self._dump_device is not None:
+                # hex dump continuation of ManufacturerData Value
+                try:
+                    self._dump_device.dump += bytes.fromhex(match.group(1))
+                except ValueError:
+                    pass
+                return []
+            self.end_dump()
+            return self.flush(now)
+
+        # any other line completes a hex dump in progress
+        self.end_dump()
+        event, mac_address, rssi, key, value, rest = match.groups()
+        if event == 'DEL':
+            device = self.devices.pop(mac_address, None)
+            if device is not None:
+                self._forget(device)
+            return self.flush(now)
+        device = self.device(mac_address)
+        device.last_seen = now
+        if rssi is not None:
+            rssi = int(rssi)
+            if not device.rssi or device.rssi[-1] != rssi:
+                self._mark(device)
+            device.rssi.append(rssi)
+        elif key is not None:
+            device.manufacturer_key = key
+        elif value is not None:
+            if device.manufacturer_key is not None:
+                try:
+                    device.dump = bytearray.fromhex(value)
+                    self._dump_device = device
+                except ValueError:
+                    pass
+        elif event == 'NEW' and rest and device.name is None:
+            device.name = rest
+            self._mark(device)
+
+        return self.flush(now)
+
+
+    def end_dump(self):
+        '''
+        Complete the manufacturer data hex dump in progress, if any
+        '''
+        device = self._dump_device
+        if device is None:
+            return
+        self._dump_device = None
+        value, device.dump = bytes(device.dump), None
+        if value and device.manufacturer_data.get(device.manufacturer_key) != value:
+            device.manufacturer_data[device.manufacturer_key] = value
+            self._mark(device)
+
+
+    def _mark(self, device):
+        device.dirty = True
+        self._dirty[device.mac_address] = device
+
+
+    def flush(self, now=None):
+        '''
+        Emit the latest state of every changed device whose interval expired,
+        return list of ScanUpdates
+        '''
+        now = time.monotonic() if now is None else now
+        updates = []
+        for device in list(self._dirty.values()):
+            if now - device.last_emitted >= self.interval:
+                updates.append(self._emit(device, now))
+
+        return updates
+
+
+    def next_due(self, now=None):
+        '''
+        Seconds until the next pending update can be emitted, None if there
+        is none
+        '''
+        if not self._dirty:
+            return None
+        now = time.monotonic() if now is None else now
+        due = min(device.last_emitted for device in self._dirty.values()) + self.interval
+        return max(0.0, due - now)
+
+
+    def _emit(self, device, now):
+        '''
+        Emit update of device
+        '''
+        del self._dirty[device.mac_address]
+        device.dirty = False
+        device.last_emitted = now
+        update = ScanUpdate(device.mac_address, device.name, device.rssi[-1] if device.rssi else None,
+                            dict(device.manufacturer_data), now)
+        for callback in self.callbacks:
+            callback(update)
+
+        return update
+
+
+    def read(self, timeout=1.0, gap=0.05):
+        '''
+        Read scan output for at most timeout seconds, yield emitted updates.
+        No output for gap seconds completes a hex dump in progress.
+        '''
+        child = self.bluetoothctl.child
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            yield from self.flush(now)
+            remaining = deadline - now
+            if remaining <= 0:
+                self.end_dump()
+                yield from self.flush()
+                return
+            due = self.next_due(now)
+            wait = remaining if due is None else min(remaining, due)
+            if self._dump_device is not None:
+                wait = min(remaining, max(wait, gap))
+            index = child.expect(['\r\n', pexpect.TIMEOUT, pexpect.EOF], timeout=wait)
+            if index == 0:
+                yield from self.feed(child.before.decode('ascii', 'replace'))
+                continue
+            self.end_dump()
+            if index == 2:
+                yield from self.flush()
+                return
+
+
+    def __iter__(self):
+        '''
+        Yield updates until the bluetoothctl session ends
+        '''
+        while self.bluetoothctl.child.isalive():
+            yield from self.read()
+
+
+    def run(self, duration):
+        '''
+        Scan for duration seconds calling the subscribed callbacks
+        '''
+        self.bluetoothctl.scan_on()
+        try:
+            for _ in self.read(duration):
+                pass
+        finally:
+            self.bluetoothctl.scan_off()
+
+
+class SessionPool:
+    '''
+    Pool of bluetoothctl sessions, one per controller mac address. A session is
+    spawned on first use, its controller is selected once and the session is then
+    reused, so operations on different controllers can run in parallel without
+    re-selecting the default controller.
+    '''
+
+
+    def __init__(self, session_factory=Bluetoothctl, timeout=30):
+        '''
+        :param session_factory: callable returning a new Bluetoothctl session
+        :param timeout: expect timeout of the sessions in seconds
+        '''
+        self.session_factory = session_factory
+        self.timeout = timeout
+        self.sessions = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def spawn(self, mac_address):
+        '''
+        Spawn a new session bound to controller mac_address
+        '''
+        session = self.session_factory()
+        session.child.timeout = self.timeout
+        # bluetoothctl stays on the default controller if the select fails,
+        # so verify the selection instead of silently using the wrong one
+        selected = session.select_controller(mac_address) and session.get_controller_info()
+        if not selected or selected.mac_address.upper() != mac_address.upper():
+            session.close()
+            raise BluetoothctlError(f'[-] Controller {mac_address} could not be selected')
+        self.sessions[mac_address] = session
+
+        return session
+
+
+    @staticmethod
+    def alive(session):
+        '''
+        Check if the bluetoothctl child of session is still running, a child
+        which reached EOF counts as dead even before it is reaped
+        '''
+        return session.child.isalive() and not session.child.eof()
+
+
+    def get(self, mac_address):
+        '''
+        Return session bound to controller mac_address, respawn it if dead
+        '''
+        session = self.sessions.get(mac_address)
+        if session is None or not self.alive(session):
+            if session is not None:
+                session.close()
+            session = self.spawn(mac_address)
+
+        return session
+
+
+    def controller_lock(self, mac_address):
+        '''
+        Return lock serialising the commands sent to one controller session
+        '''
+        with self.lock:
+            return self.locks.setdefault(mac_address, threading.Lock())
+
+
+    def run(self, mac_address, operation, *args, **kwargs):
+        '''
+        Run Bluetoothctl method operation on controller mac_address, the session is
+        respawned and the operation repeated once if bluetoothctl died during it.
+        The methods report a dead child as a failure, so it is detected after the call.
+        '''
+        with self.controller_lock(mac_address):
+            session = self.get(mac_address)
+            try:
+                result = getattr(session, operation)(*args, **kwargs)
+            except (pexpect.EOF, BluetoothctlError):
+                result = None
+            if self.alive(session):
+                return result
+            session.close()
+            return getattr(self.spawn(mac_address), operation)(*args, **kwargs)
+
+
+    def map(self, operation, mac_addresses, *args, **kwargs):
+        '''
+        Run operation on several controllers in parallel, return dict of
+        {mac_address: result}.
+        '''
+        mac_addresses = list(mac_addresses)
+        with ThreadPoolExecutor(max_workers=max(len(mac_addresses), 1)) as executor:
+            futures = [executor.submit(self.run, mac_address, operation, *args, **kwargs)
+                       for mac_address in mac_addresses]
+
+        return {mac_address: future.result() for mac_address, future in zip(mac_addresses, futures)}
+
+
+    def health_check(self):
+        '''
+        Respawn dead sessions, return list of respawned controller mac addresses
+        '''
+        respawned = []
+        for mac_address in list(self.sessions):
+            with self.controller_lock(mac_address):
+                session = self.sessions[mac_address]
+                try:
+                    alive = self.alive(session) and session.get_output('version') is not None
+                except (pexpect.EOF, pexpect.TIMEOUT, BluetoothctlError):
+                    alive = False
+                if not alive:
+                    session.close()
+                    self.spawn(mac_address)
+                    respawned.append(mac_address)
+
+        return respawned
+
+
+    def close(self):
+        '''
+        Close all sessions
+        '''
+        for session in self.sessions.values():
+            session.close()
+        self.sessions.clear()
+
+
+def run_operations(session, mac_address, operations, results=None):
+    '''
+    Run a chain of operations (Bluetoothctl method names) on one device, stop at
+    the first failed one. Return dict of {operation: success}, results are filled
+    in place if given, so they are kept when an operation raises.
+    '''
+    results = {} if results is None else results
+    for operation in operations:
+        results[operation] = bool(getattr(session, operation)(mac_address))
+        if not results[operation]:
+            break
+
+    return results
+
+
+def batch(mac_addresses, operations=PROVISION, max_workers=8, timeout=30, retries=2,
+          backoff=1.0, session_factory=Bluetoothctl):
+    '''
+    Run a chain of operations (e.g. pair, trust, connect) on several devices in
+    parallel. Every worker thread drives its own bluetoothctl session so that the
+    expects of different devices do not block each other, at most max_workers
+    devices are processed at once. Each operation waits at most timeout seconds,
+    a failed chain is retried up to retries times with exponential backoff
+    (backoff, 2 * backoff, ...). A retry resumes at the first operation which did
+    not succeed, e.g. a device paired in the first attempt is not paired again.
+    After a timeout or EOF the session is out of sync with its prompt, so the
+    retry runs on a fresh session. A worker closes its session as soon as no
+    devices are left, overlapping with the devices still in progress.
+
+    Return a report as a dict of {mac_address: {'success': bool,
+    'operations': {operation: success}, 'attempts': int, 'error': str or None,
+    'elapsed': seconds}}.
+    '''
+    mac_addresses = list(mac_addresses)
+    pending = iter(mac_addresses)
+    reports = {}
+    lock = threading.Lock()
+
+    def next_mac_address():
+        with lock:
+            return next(pending, None)
+
+    def get_session(session):
+        if session is None or not session.child.isalive():
+            if session is not None:
+                session.close()
+            session = session_factory()
+            session.child.timeout = timeout
+        return session
+
+    def provision(mac_address, session):
+        start = time.monotonic()
+        report = {'success': False, 'operations': {}, 'attempts': 0, 'error': None}
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+            report['attempts'] = attempt + 1
+            remaining = [operation for operation in operations if not report['operations'].get(operation)]
+            try:
+                session = get_session(session)
+                run_operations(session, mac_address, remaining, report['operations'])
+            except (pexpect.TIMEOUT, pexpect.EOF) as e:
+                # the session is out of sync with its prompt, start over with a new one
+                report['error'] = type(e).__name__
+                session.close()
+                session = None
+            else:
+                report['success'] = all(report['operations'].get(operation) for operation in operations)
+                report['error'] = None if report['success'] else 'failed'
+            if report['success']:
+                break
+        report['elapsed'] = time.monotonic() - start
+
+        return report, session
+
+    def worker():
+        session = None
+        try:
+            mac_address = next_mac_address()
+            while mac_address is not None:
+                reports[mac_address], session = provision(mac_address, session)
+                mac_address = next_mac_address()
+        finally:
+            if session is not None:
+                session.close()
+
+    n_workers = max(1, min(max_workers, len(mac_addresses)))
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(worker) for _ in range(n_workers)]
+    for future in futures:
+        future.result()
+
+    return {mac_address: reports[mac_address] for mac_address in mac_addresses}
+
+
 # <-------------------------------------------------------------------- solo run --->
 if __name__ == '__main__':
     bl = Bluetoothctl()
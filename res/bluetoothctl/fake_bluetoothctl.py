@@ -0,0 +1,228 @@
+#!/usr/local/bin/python3.7
+'''
+Scripted bluetoothctl replacement replaying recorded transcripts, to be run
+on a pty (e.g. Bluetoothctl(command='python3 fake_bluetoothctl.py')).
+
+A transcript is a JSON file {"responses": {command: [chunk, ...]},
+"failures": {command: [chunk, ...]}}. A command is looked up by its full text
+first and then by its first word. Every chunk is written after the configured
+delay, {prompt}, {args}, {devices} and {paired} are substituted in chunks.
+'''
+
+# <-------------------------------------------------------------- global imports --->
+import argparse
+import json
+import random
+import sys
+import time
+
+
+# <------------------------------------------------------------ global variables --->
+PROMPT = '[\x1b[0;94mbluetooth\x1b[0m]# '
+CHG = '[\x1b[0;93mCHG\x1b[0m]'
+CONTROLLER = '00:1A:7D:DA:71:13'
+
+TRANSCRIPT = {
+    'responses': {
+        'version': ['Version 5.50\n{prompt}'],
+        'list': [f'Controller {CONTROLLER} raspberrypi [default]\n{{prompt}}'],
+        'show': [f'Controller {CONTROLLER} (public)\n'
+                 '\tName: raspberrypi\n'
+                 '\tAlias: raspberrypi\n'
+                 '\tClass: 0x00000000\n'
+                 '\tPowered: yes\n'
+                 '\tDiscoverable: no\n'
+                 '\tPairable: yes\n'
+                 '\tUUID: Generic Attribute Profile (00001801-0000-1000-8000-00805f9b34fb)\n'
+                 '\tUUID: A/V Remote Control        (0000110e-0000-1000-8000-00805f9b34fb)\n'
+                 '\tUUID: Generic Access Profile    (00001800-0000-1000-8000-00805f9b34fb)\n'
+                 '\tModalias: usb:v1D6Bp0246d0532\n'
+                 '\tDiscovering: no\n{prompt}'],
+        'info': ['Device {args} (public)\n'
+                 '\tName: Headset\n'
+                 '\tAlias: Headset\n'
+                 '\tClass: 0x00240404\n'
+                 '\tIcon: audio-card\n'
+                 '\tPaired: yes\n'
+                 '\tTrusted: yes\n'
+                 '\tBlocked: no\n'
+                 '\tConnected: yes\n'
+                 '\tLegacyPairing: no\n'
+                 '\tUUID: Audio Sink                (0000110b-0000-1000-8000-00805f9b34fb)\n'
+                 '\tUUID: A/V Remote Control        (0000110e-0000-1000-8000-00805f9b34fb)\n'
+                 '\tUUID: Handsfree                 (0000111e-0000-1000-8000-00805f9b34fb)\n'
+                 '\tModalias: bluetooth:v000Ap4A60d0100\n{prompt}'],
+        'devices': ['{devices}{prompt}'],
+        'paired-devices': ['{paired}{prompt}'],
+        f'select {CONTROLLER}': ['{prompt}'],
+        'select': ['Controller {args} not available\n{prompt}'],
+        'scan': ['Discovery started\n{prompt}'],
+        'power': ['Changing power succeeded\n{prompt}'],
+        'pairable': ['Changing pairable succeeded\n{prompt}'],
+        'discoverable': ['Changing discoverable succeeded\n{prompt}'],
+        'pair': ['Attempting to pair with {args}\n{prompt}', 'Pairing successful\n'],
+        'trust': ['{prompt}', 'Changing {args} trust succeeded\n'],
+        'untrust': ['{prompt}', 'Changing {args} untrust succeeded\n'],
+        'block': ['{prompt}', 'Changing {args} block succeeded\n'],
+        'unblock': ['{prompt}', 'Changing {args} unblock succeeded\n'],
+        'remove': ['{prompt}', 'Device has been removed\n'],
+        'connect': ['Attempting to connect to {args}\n{prompt}', 'Connection successful\n'],
+        'disconnect': ['Attempting to disconnect from {args}\n{prompt}', 'Successful disconnect\n'],
+    },
+    'failures': {
+        'pair': ['Attempting to pair with {args}\n{prompt}',
+                 'Failed to pair: org.bluez.Error.AuthenticationFailed\n'],
+        'trust': ['Device {args} not available\n{prompt}', 'Device {args} not available\n'],
+        'connect': ['Attempting to connect to {args}\n{prompt}',
+                    'Failed to connect: org.bluez.Error.Failed\n'],
+        'disconnect': ['Attempting to disconnect from {args}\n{prompt}',
+                       'Failed to disconnect: org.bluez.Error.Failed\n'],
+    },
+}
+
+
+# <--------------------------------------------------------- main body of module --->
+def mac(i):
+    '''
+    Generate a mac address from an integer
+    '''
+    return ':'.join(f'{(i >> (8 * b)) & 0xff:02X}' for b in range(5, -1, -1))
+
+
+class FakeBluetoothctl:
+    '''
+    Replays transcript responses for commands read from stdin
+    '''
+
+
+    def __init__(self, transcript=TRANSCRIPT, delay=0.0, jitter=0.0, flood=0, fail_rate=0.0,
+                 die_after=-1, n_devices=10, n_paired=2, seed=None):
+        '''
+        :param transcript: dict with responses and failures
+        :param delay: delay before every written chunk in seconds
+        :param jitter: random delay added to delay, uniform in [0, jitter]
+        :param flood: number of [CHG] RSSI / ManufacturerData events written before every
+                      response, each redrawing the prompt like interactive bluetoothctl
+        :param fail_rate: probability of replaying a failure response if there is one
+        :param die_after: exit after this many commands (EOF on the client), -1 = never
+        :param n_devices: number of devices in devices listing
+        :param n_paired: number of devices in paired-devices listing
+        :param seed: random seed
+        '''
+        self.responses = transcript.get('responses', {})
+        self.failures = transcript.get('failures', {})
+        self.delay = delay
+        self.jitter = jitter
+        self.flood = flood
+        self.fail_rate = fail_rate
+        self.die_after = die_after
+        self.random = random.Random(seed)
+        self.devices = ''.join(f'Device {mac(i)} Device {i}\n' for i in range(n_devices))
+        self.paired = ''.join(f'Device {mac(i)} Device {i}\n' for i in range(n_paired))
+        self.count = 0
+
+
+    def write(self, text):
+        '''
+        Write text to stdout after the configured delay
+        '''
+        pause = self.delay + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if pause:
+            time.sleep(pause)
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+    def lookup(self, command):
+        '''
+        Return response chunks for command
+        '''
+        word = command.split(' ', 1)[0]
+        if self.fail_rate and self.random.random() < self.fail_rate:
+            chunks = self.failures.get(command, self.failures.get(word))
+            if chunks is not None:
+                return chunks
+
+        return self.responses.get(command, self.responses.get(word,
+                                  [f'Invalid command in menu main: {word}\n{{prompt}}']))
+
+
+    def event(self):
+        '''
+        Return a random [CHG] event as printed by bluetoothctl: every line
+        clears the prompt line, is printed and redraws the prompt
+        '''
+        device = f'{CHG} Device {mac(self.random.randrange(1 << 24))}'
+        if self.random.random() < 0.8:
+            lines = [f'{device} RSSI: {self.random.randint(-100, -30)}']
+        else:
+            data = bytes(self.random.randrange(256) for _ in range(self.random.randint(4, 24)))
+            lines = [f'{device} ManufacturerData Key: 0x004c',
+                     f'{device} ManufacturerData Value:']
+            lines += ['  ' + ' '.join(f'{b:02x}' for b in data[i:i + 16]) + ' ' * (50 - 3 * len(data[i:i + 16]))
+                      + ''.join(chr(b) if 32 <= b < 127 else '.' for b in data[i:i + 16])
+                      for i in range(0, len(data), 16)]
+
+        return ''.join(f'\r\x1b[K{line}\n{PROMPT}' for line in lines)
+
+
+    def respond(self, command):
+        '''
+        Write the response to one command
+        '''
+        args = command.split(' ', 1)[1] if ' ' in command else ''
+        if self.flood:
+            self.write(''.join(self.event() for _ in range(self.flood)))
+        for chunk in self.lookup(command):
+            self.write(chunk.format(prompt=PROMPT, args=args, devices=self.devices,
+                                    paired=self.paired))
+
+
+    def run(self):
+        '''
+        Serve commands from stdin until quit, EOF or die_after
+        '''
+        for line in sys.stdin:
+            command = line.strip()
+            if not command:
+                continue
+            if command in ('quit', 'exit'):
+                break
+            if self.count == self.die_after:
+                sys.exit(1)
+            self.count += 1
+            self.respond(command)
+
+
+# <-------------------------------------------------------------------- solo run --->
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-t', '--transcript', help='JSON transcript, default = built-in')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='delay before every response chunk in seconds, default = 0.0')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random extra delay in seconds, default = 0.0')
+    parser.add_argument('--flood', type=int, default=0,
+                        help='number of events before every response, default = 0')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='probability of a failure response, default = 0.0')
+    parser.add_argument('--die-after', type=int, default=-1,
+                        help='exit after this many commands, default = -1 => never')
+    parser.add_argument('--devices', type=int, default=10,
+                        help='number of available devices, default = 10')
+    parser.add_argument('--paired', type=int, default=2,
+                        help='number of paired devices, default = 2')
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    args = parser.parse_args()
+
+    transcript = TRANSCRIPT
+    if args.transcript:
+        with open(args.transcript, 'r', encoding='utf-8') as transcript_file:
+            transcript = json.load(transcript_file)
+
+    try:
+        FakeBluetoothctl(transcript, args.delay, args.jitter, args.flood, args.fail_rate,
+                         args.die_after, args.devices, args.paired, args.seed).run()
+    except KeyboardInterrupt:
+        pass
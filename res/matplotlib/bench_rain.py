@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the rain simulation step time versus the number of drops.
+"""
+
+import argparse
+import time
+
+from rain import Rain
+
+
+def bench_step(n_drops, spawn_rate, steps=100, repeat=3):
+    """
+    Best mean time of one simulation step in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        rain = Rain(n_drops, spawn_rate)
+        start = time.perf_counter()
+        for frame_number in range(steps):
+            rain.step(frame_number)
+        best = min(best, (time.perf_counter() - start) / steps)
+    return best
+
+
+def main(drop_counts=(50, 1000, 10000, 100000, 1000000), lifetime=50, steps=100):
+    """
+    Print step time for every drop count, drops live lifetime frames so
+    n_drops / lifetime of them are re-spawned every step.
+    """
+    print(f'{"drops":>9} {"spawn/step":>10} {"step ms":>9} {"Mdrops/s":>9} {"max FPS":>9}')
+    for n_drops in drop_counts:
+        spawn_rate = max(1, n_drops // lifetime)
+        step = bench_step(n_drops, spawn_rate, steps)
+        print(f'{n_drops:>9} {spawn_rate:>10} {step * 1e3:9.3f} {n_drops / step / 1e6:9.1f} '
+              f'{1 / step:9.0f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-d', '--drops', type=int, nargs='+',
+                        default=[50, 1000, 10000, 100000, 1000000],
+                        help='drop counts, default = 50 1000 10000 100000 1000000')
+    parser.add_argument('-l', '--lifetime', type=int, default=50,
+                        help='lifetime of a drop in frames, default = 50')
+    parser.add_argument('-s', '--steps', type=int, default=100,
+                        help='number of timed steps, default = 100')
+    args = parser.parse_args()
+    main(args.drops, args.lifetime, args.steps)
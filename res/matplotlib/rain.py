@@ -6,68 +6,294 @@ Rain simulation
 ===============
 
 Simulates rain drops on a surface by animating the scale and opacity
-of 50 scatter points.
+of 50 (or --drops) scatter points.
 
 Author: Nicolas P. Rougier
 """
 
+import argparse
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 
-# Fixing random state for reproducibility
-np.random.seed(19680801)
+class FrameMeter:
+    """
+    On-screen meter of the achieved frame rate and frame time, smoothed by
+    an exponential moving average over the intervals between ticks.
+    """
+
+    def __init__(self, ax, target_fps=100, smoothing=0.9):
+        self.target_fps = target_fps
+        self.smoothing = smoothing
+        self.frame_time = None
+        self.last = None
+        self.text = ax.text(0.01, 0.99, '', transform=ax.transAxes, va='top', ha='left',
+                            family='monospace', fontsize=9)
+
+    def tick(self, status=''):
+        """
+        Register a rendered frame and update the meter text, status is shown
+        on the next line.
+        """
+        now = time.perf_counter()
+        if self.last is not None:
+            interval = now - self.last
+            if self.frame_time is None:
+                self.frame_time = interval
+            else:
+                self.frame_time = self.smoothing * self.frame_time + (1 - self.smoothing) * interval
+            self.text.set_text(f'{1 / self.frame_time:6.1f} FPS {self.frame_time * 1e3:6.2f} ms '
+                               f'(target {self.target_fps} FPS)' + (f'\n{status}' if status else ''))
+        self.last = now
+        return self.text
+
+
+def create_figure():
+    """
+    Create new Figure and an Axes which fills it.
+    """
+    fig = plt.figure(figsize=(7, 7))
+    ax = fig.add_axes([0, 0, 1, 1], frameon=False)
+    ax.set_xlim(0, 1), ax.set_xticks([])
+    ax.set_ylim(0, 1), ax.set_yticks([])
+    return fig, ax
+
+
+def create_rain(n_drops, rng=np.random):
+    """
+    Create rain data, the raindrops in random positions and with
+    random growth rates.
+    """
+    rain_drops = np.zeros(n_drops, dtype=[('position', float, 2),
+                                          ('size',     float),
+                                          ('growth',   float),
+                                          ('color',    float, 4)])
+    rain_drops['position'] = rng.uniform(0, 1, (n_drops, 2))
+    rain_drops['growth'] = rng.uniform(50, 200, n_drops)
+    return rain_drops
+
+
+class Rain:
+    """
+    Rain simulation, every step spawn_rate of the oldest drops are re-spawned
+    as one batch over a ring of indices, all updates are done in place.
+    """
+
+    def __init__(self, n_drops=50, spawn_rate=1, seed=19680801):
+        if not 0 < spawn_rate <= n_drops:
+            raise ValueError(f'spawn_rate must be in (0, {n_drops}], got {spawn_rate}')
+        # Fixing random state for reproducibility, every frame draws from its
+        # own generator seeded by (seed, frame_number), so any frame range can
+        # be simulated independently (see seek()).
+        self.seed = seed
+        self.drops = create_rain(n_drops, np.random.default_rng(seed))
+        self.n_drops = n_drops
+        self.spawn_rate = spawn_rate
+        # Every drop lives n_drops / spawn_rate steps, fade it out over its lifetime.
+        self.fade = spawn_rate / n_drops
+        # Views of the fields and scratch buffers for the re-spawned batch.
+        self.position = self.drops['position']
+        self.size = self.drops['size']
+        self.growth = self.drops['growth']
+        self.color = self.drops['color']
+        self.alpha = self.color[:, 3]
+        self.ring = np.arange(spawn_rate)
+        self.index = np.empty(spawn_rate, dtype=np.intp)
+        self.new_position = np.empty((spawn_rate, 2))
+        self.new_growth = np.empty(spawn_rate)
+
+    def seek(self, frame_number):
+        """
+        Bring the simulation to the state before frame_number. Every drop is
+        re-spawned within one lifetime, so only the last lifetime of steps
+        needs to be replayed.
+        """
+        lifetime = -(-self.n_drops // self.spawn_rate)
+        start = frame_number - lifetime
+        if start <= 0:
+            start = 0
+            self.drops[...] = create_rain(self.n_drops, np.random.default_rng(self.seed))
+        for number in range(start, frame_number):
+            self.step(number)
+
+    def step(self, frame_number):
+        rng = np.random.default_rng((self.seed, frame_number))
+
+        # Get the indices of the oldest raindrops which we re-spawn.
+        np.add(self.ring, frame_number * self.spawn_rate, out=self.index)
+        np.remainder(self.index, self.n_drops, out=self.index)
+
+        # Make all colors more transparent as time progresses.
+        np.subtract(self.alpha, self.fade, out=self.alpha)
+        np.clip(self.alpha, 0, 1, out=self.alpha)
 
+        # Make all circles bigger.
+        np.add(self.size, self.growth, out=self.size)
 
-# Create new Figure and an Axes which fills it.
-fig = plt.figure(figsize=(7, 7))
-ax = fig.add_axes([0, 0, 1, 1], frameon=False)
-ax.set_xlim(0, 1), ax.set_xticks([])
-ax.set_ylim(0, 1), ax.set_yticks([])
+        # Pick new positions for the oldest rain drops, resetting their size,
+        # color and growth factor.
+        rng.random(out=self.new_position)
+        rng.random(out=self.new_growth)
+        np.multiply(self.new_growth, 150, out=self.new_growth)
+        np.add(self.new_growth, 50, out=self.new_growth)
+        self.position[self.index] = self.new_position
+        self.size[self.index] = 5
+        self.color[self.index] = (0, 0, 0, 1)
+        self.growth[self.index] = self.new_growth
+        return self.drops
 
-# Create rain data
-n_drops = 50
-rain_drops = np.zeros(n_drops, dtype=[('position', float, 2),
-                                      ('size',     float, 1),
-                                      ('growth',   float, 1),
-                                      ('color',    float, 4)])
 
-# Initialize the raindrops in random positions and with
-# random growth rates.
-rain_drops['position'] = np.random.uniform(0, 1, (n_drops, 2))
-rain_drops['growth'] = np.random.uniform(50, 200, n_drops)
+class FixedTimestep:
+    """
+    Fixed timestep driver of the rain simulation. Real time elapsed between
+    rendered frames is accumulated and consumed in steps of step_time, so the
+    rain runs at the same speed however slow the rendering is, the renderer
+    shows the latest state and frames not rendered in time count as dropped.
+    At most max_steps steps are run per frame, the time of the steps beyond
+    is discarded and counted as skipped, so a step slower than step_time
+    slows the rain down instead of piling up ever more catch-up steps.
+    """
 
-# Construct the scatter which we will update during animation
-# as the raindrops develop.
-scat = ax.scatter(rain_drops['position'][:, 0], rain_drops['position'][:, 1],
-                  s=rain_drops['size'], lw=0.5, edgecolors=rain_drops['color'],
-                  facecolors='none')
+    def __init__(self, rain, step_time=0.01, frame_time=0.01, max_steps=5):
+        self.rain = rain
+        self.step_time = step_time
+        self.frame_time = frame_time
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.start = None
+        self.last = None
+        self.steps = 0
+        self.skipped = 0
+        self.frames = 0
+        self.dropped = 0
 
+    def advance(self, now=None):
+        """
+        Run the simulation steps due since the last call and register
+        a rendered frame, returns the number of steps run.
+        """
+        now = time.perf_counter() if now is None else now
+        if self.start is None:
+            self.start = self.last = now
+        self.accumulator += now - self.last
+        self.last = now
 
-def update(frame_number):
-    # Get an index which we can use to re-spawn the oldest raindrop.
-    current_index = frame_number % n_drops
+        # the tolerance keeps rounding errors of the accumulated float time
+        # from postponing a step which is due
+        steps = int((self.accumulator + 1e-9) // self.step_time)
+        self.accumulator -= steps * self.step_time
+        if steps > self.max_steps:
+            self.skipped += steps - self.max_steps
+            steps = self.max_steps
+        for _ in range(steps):
+            self.rain.step(self.steps)
+            self.steps += 1
 
-    # Make all colors more transparent as time progresses.
-    rain_drops['color'][:, 3] -= 1.0/len(rain_drops)
-    rain_drops['color'][:, 3] = np.clip(rain_drops['color'][:, 3], 0, 1)
+        self.frames += 1
+        expected = int((now - self.start) // self.frame_time) + 1
+        self.dropped = max(self.dropped, expected - self.frames)
+        return steps
 
-    # Make all circles bigger.
-    rain_drops['size'] += rain_drops['growth']
+    @property
+    def steps_per_second(self):
+        elapsed = self.last - self.start if self.start is not None else 0
+        return self.steps / elapsed if elapsed > 0 else 0.0
 
-    # Pick a new position for oldest rain drop, resetting its size,
-    # color and growth factor.
-    rain_drops['position'][current_index] = np.random.uniform(0, 1, 2)
-    rain_drops['size'][current_index] = 5
-    rain_drops['color'][current_index] = (0, 0, 0, 1)
-    rain_drops['growth'][current_index] = np.random.uniform(50, 200)
+    def status(self):
+        return (f'{self.steps_per_second:6.1f} steps/s {self.frames} frames '
+                f'{self.dropped} dropped {self.skipped * self.step_time:.2f} s skipped')
 
+
+def draw(rain_drops, scat, meter=None, status=''):
     # Update the scatter collection, with the new colors, sizes and positions.
     scat.set_edgecolors(rain_drops['color'])
     scat.set_sizes(rain_drops['size'])
     scat.set_offsets(rain_drops['position'])
 
+    # Return the changed artists, with blitting only these are redrawn
+    # over the cached background.
+    if meter is None:
+        return scat,
+    return scat, meter.tick(status)
+
+
+def update(frame_number, rain, scat, meter=None):
+    return draw(rain.step(frame_number), scat, meter)
+
+
+class Scene:
+    """
+    Figure with the rain scatter, also used for headless export by render.py.
+    """
+
+    def __init__(self, n_drops=50, spawn_rate=1, seed=19680801):
+        self.fig, self.ax = create_figure()
+        self.rain = Rain(n_drops, spawn_rate, seed)
+        rain_drops = self.rain.drops
+
+        # Construct the scatter which we will update during animation
+        # as the raindrops develop.
+        self.scat = self.ax.scatter(rain_drops['position'][:, 0], rain_drops['position'][:, 1],
+                                    s=rain_drops['size'], lw=0.5, edgecolors=rain_drops['color'],
+                                    facecolors='none')
+
+    def seek(self, frame_number):
+        self.rain.seek(frame_number)
+
+    def update(self, frame_number, meter=None):
+        return update(frame_number, self.rain, self.scat, meter)
+
+    def update_realtime(self, frame_number, loop, meter=None):
+        loop.advance()
+        return draw(self.rain.drops, self.scat, meter, loop.status() if meter else '')
+
+
+def main(n_drops=50, spawn_rate=1, interval=10, blit=True, meter=True, fixed_step=True,
+         max_steps=5):
+    """
+    Run the animation, with blit the static background is cached and only
+    the scatter (and the meter) is redrawn every frame. With fixed_step the
+    simulation advances every interval of real time independently of the
+    achieved frame rate, at most max_steps steps per frame, else one step
+    is done per rendered frame. The loop counters are shown by the meter and
+    printed when the window is closed.
+    """
+    scene = Scene(n_drops, spawn_rate)
+    frame_meter = FrameMeter(scene.ax, 1000 // interval) if meter else None
+
+    # Construct the animation, using the update function as the animation director.
+    if fixed_step:
+        loop = FixedTimestep(scene.rain, interval / 1000, interval / 1000, max_steps)
+        func, fargs = scene.update_realtime, (loop, frame_meter)
+    else:
+        func, fargs = scene.update, (frame_meter,)
+    animation = FuncAnimation(scene.fig, func, fargs=fargs,
+                              interval=interval, blit=blit, cache_frame_data=False)
+    plt.show()
+    if fixed_step:
+        print(loop.status())
+    return animation
+
 
-# Construct the animation, using the update function as the animation director.
-animation = FuncAnimation(fig, update, interval=10)
-plt.show()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--no-blit', dest='blit', action='store_false',
+                        help='redraw the full figure every frame')
+    parser.add_argument('--no-meter', dest='meter', action='store_false',
+                        help='hide the frame rate meter')
+    parser.add_argument('--frame-locked', dest='fixed_step', action='store_false',
+                        help='advance the simulation once per rendered frame')
+    parser.add_argument('-n', '--drops', type=int, default=50,
+                        help='number of rain drops, default = 50')
+    parser.add_argument('-s', '--spawn-rate', type=int, default=1,
+                        help='number of drops re-spawned every step, default = 1')
+    parser.add_argument('-i', '--interval', type=int, default=10,
+                        help='delay between frames and simulation step in ms, default = 10')
+    parser.add_argument('-m', '--max-steps', type=int, default=5,
+                        help='maximal number of simulation steps per frame, default = 5')
+    args = parser.parse_args()
+    main(args.drops, args.spawn_rate, args.interval, args.blit, args.meter, args.fixed_step,
+         args.max_steps)
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+
+"""
+==========================
+Headless parallel renderer
+==========================
+
+Renders frames of the rain.py and simple_3danim.py animations with the Agg
+backend into raw RGB buffers. Frame ranges are split into chunks rendered by
+a process pool, every scene is seeded so that any chunk reproduces exactly
+the frames of a serial run. The frames are streamed in order into a video
+(through ffmpeg), a raw RGB file or an image sequence.
+
+    render.py rain -n 1000 -o rain.mp4
+    render.py 3danim -n 25 -o frames/anim_%04d.png
+    render.py rain -n 500 -O n_drops=100000 -O spawn_rate=2000 -o rain.rgb
+"""
+
+import argparse
+import ast
+import collections
+import importlib
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import matplotlib.pyplot as plt
+
+
+# scene name -> module providing a Scene class with fig, seek() and update()
+SCENES = {'rain': 'rain', '3danim': 'simple_3danim'}
+VIDEO = ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.gif')
+
+
+def render_chunk(task):
+    """
+    Render frames [start, stop) of a scene, return (frame shape, list of raw
+    RGB frames), with pattern the frames are saved as images instead and the
+    list is empty.
+    """
+    scene_name, options, start, stop, dpi, pattern = task
+    scene = importlib.import_module(SCENES[scene_name]).Scene(**options)
+    scene.fig.set_dpi(dpi)
+    scene.seek(start)
+
+    shape = None
+    frames = []
+    for frame_number in range(start, stop):
+        scene.update(frame_number)
+        scene.fig.canvas.draw()
+        rgb = np.asarray(scene.fig.canvas.buffer_rgba())[..., :3]
+        shape = rgb.shape
+        if pattern:
+            plt.imsave(pattern % frame_number, rgb)
+        else:
+            frames.append(rgb.tobytes())
+    plt.close(scene.fig)
+    return shape, frames
+
+
+def open_sink(output, shape, fps):
+    """
+    Open the output stream for raw RGB frames of shape (height, width, 3).
+    """
+    if output.lower().endswith(VIDEO):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError('ffmpeg is needed for video output, use .rgb or an image pattern')
+        height, width, _ = shape
+        process = subprocess.Popen([ffmpeg, '-loglevel', 'error', '-y',
+                                    '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                    '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                                    '-pix_fmt', 'yuv420p', output], stdin=subprocess.PIPE)
+        return process
+    return open(output, 'wb')
+
+
+def close_sink(sink, abort=False):
+    """
+    Close the output stream, with abort a running ffmpeg is killed instead of
+    finishing the video.
+    """
+    if isinstance(sink, subprocess.Popen):
+        if abort:
+            sink.kill()
+        try:
+            sink.stdin.close()
+        except OSError:
+            # ffmpeg already exited, the pipe is broken
+            pass
+        if sink.wait() and not abort:
+            raise RuntimeError(f'ffmpeg failed with exit code {sink.returncode}')
+    else:
+        sink.close()
+
+
+def bounded_imap(pool, func, tasks, window):
+    """
+    Ordered results of func over tasks from pool with at most window tasks in
+    flight, so rendered frames do not pile up when the sink is slower than
+    the workers.
+    """
+    pending = collections.deque()
+    for task in tasks:
+        if len(pending) >= window:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(func, (task,)))
+    while pending:
+        yield pending.popleft().get()
+
+
+def render(scene_name, n_frames, output, start=0, options=None, processes=None, chunk=None,
+           fps=30, dpi=100):
+    """
+    Render frames [start, start + n_frames) of a scene into output, a video
+    file (.mp4, .mkv, ...), a raw RGB file or an image pattern like
+    frames/frame_%05d.png. Returns the number of rendered frames.
+    """
+    options = options or {}
+    processes = processes or os.cpu_count()
+    chunk = chunk or max(1, math.ceil(n_frames / (4 * processes)))
+    pattern = output if '%' in output else None
+    if pattern and os.path.dirname(pattern):
+        os.makedirs(os.path.dirname(pattern), exist_ok=True)
+
+    stop = start + n_frames
+    tasks = [(scene_name, options, first, min(first + chunk, stop), dpi, pattern)
+             for first in range(start, stop, chunk)]
+
+    sink = None
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    try:
+        # the chunks are returned in order, so frames are streamed as soon as
+        # all previous chunks are done, at most one chunk per worker is held
+        results = (bounded_imap(pool, render_chunk, tasks, processes) if pool
+                   else map(render_chunk, tasks))
+        for shape, frames in results:
+            if pattern:
+                continue
+            if sink is None:
+                sink = open_sink(output, shape, fps)
+            stream = sink.stdin if isinstance(sink, subprocess.Popen) else sink
+            for frame in frames:
+                stream.write(frame)
+    except BaseException:
+        # do not wait for the queued chunks to be rendered for nothing
+        if pool:
+            pool.terminate()
+            pool.join()
+        if sink is not None:
+            close_sink(sink, abort=True)
+        raise
+    if pool:
+        pool.close()
+        pool.join()
+    if sink is not None:
+        close_sink(sink)
+    return n_frames
+
+
+def parse_option(option):
+    key, _, value = option.partition('=')
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return key, value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scene', choices=sorted(SCENES), help='animation to render')
+    parser.add_argument('-n', '--frames', type=int, default=100,
+                        help='number of frames, default = 100')
+    parser.add_argument('-s', '--start', type=int, default=0,
+                        help='first frame, default = 0')
+    parser.add_argument('-o', '--output', default='frames.rgb',
+                        help='video file, raw .rgb file or image pattern, default = frames.rgb')
+    parser.add_argument('-O', '--option', action='append', default=[], type=parse_option,
+                        help='scene option KEY=VALUE, e.g. n_drops=1000')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='number of worker processes, default = number of cores')
+    parser.add_argument('-c', '--chunk', type=int, default=None,
+                        help='frames per task, default = frames / (4 * processes)')
+    parser.add_argument('--fps', type=int, default=30, help='video frame rate, default = 30')
+    parser.add_argument('--dpi', type=int, default=100, help='figure resolution, default = 100')
+    args = parser.parse_args()
+    render(args.scene, args.frames, args.output, args.start, dict(args.option),
+           args.processes, args.chunk, args.fps, args.dpi)
@@ -7,13 +7,35 @@
 
 An animated plot in 3D.
 """
+import argparse
+
 import numpy as np
 import matplotlib.pyplot as plt
-import mpl_toolkits.mplot3d.axes3d as p3
 import matplotlib.animation as animation
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
 
-# Fixing random state for reproducibility
-np.random.seed(19680801)
+def Gen_RandLines(n_lines, length, dims=2):
+    """
+    Create n_lines lines using a random walk algorithm, returns an array
+    of shape (n_lines, dims, length).
+
+    length is the number of points for the line.
+    dims is the number of dimensions the line has.
+    """
+    lineData = np.empty((n_lines, dims, length))
+    lineData[:, :, 0] = np.random.rand(n_lines, dims)
+    # scaling the random numbers by 0.1 so
+    # movement is small compared to position.
+    # subtraction by 0.5 is to change the range to [-0.5, 0.5]
+    # to allow a line to move backwards.
+    lineData[:, :, 1:] = np.random.rand(n_lines, dims, length - 1)
+    lineData[:, :, 1:] -= 0.5
+    lineData[:, :, 1:] *= 0.1
+    # the walk is the cumulative sum of the steps from the start point
+    np.cumsum(lineData, axis=2, out=lineData)
+
+    return lineData
 
 
 def Gen_RandLine(length, dims=2):
@@ -23,51 +45,70 @@ def Gen_RandLine(length, dims=2):
     length is the number of points for the line.
     dims is the number of dimensions the line has.
     """
-    lineData = np.empty((dims, length))
-    lineData[:, 0] = np.random.rand(dims)
-    for index in range(1, length):
-        # scaling the random numbers by 0.1 so
-        # movement is small compared to position.
-        # subtraction by 0.5 is to change the range to [-0.5, 0.5]
-        # to allow a line to move backwards.
-        step = ((np.random.rand(dims) - 0.5) * 0.1)
-        lineData[:, index] = lineData[:, index - 1] + step
+    return Gen_RandLines(1, length, dims)[0]
 
-    return lineData
 
+def update_lines(num, points, lines):
+    # points is a (n_lines, length, 3) view of the data, the segments
+    # are views of its first num points.
+    lines.set_segments(points[:, :max(num, 1)])
+    return lines,
+
+
+class Scene:
+    """
+    Figure with the random walks, also used for headless export by render.py.
+    Every frame depends only on the data, so seek() has nothing to replay.
+    """
+
+    def __init__(self, n_lines=50, length=25, seed=19680801):
+        # Fixing random state for reproducibility
+        np.random.seed(seed)
+
+        # Attaching 3D axis to the figure
+        self.fig = plt.figure()
+        self.ax = self.fig.add_subplot(projection='3d')
+
+        # All random 3-D lines at once, as (n_lines, 3, length) array
+        self.data = Gen_RandLines(n_lines, length, 3)
+        self.points = self.data.transpose(0, 2, 1)
+
+        # One collection drawing all lines, coloured by the colour cycle.
+        colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        self.lines = Line3DCollection(self.points[:, :1], colors=colors)
+        self.ax.add_collection3d(self.lines)
 
-def update_lines(num, dataLines, lines):
-    for line, data in zip(lines, dataLines):
-        # NOTE: there is no .set_data() for 3 dim data...
-        line.set_data(data[0:2, :num])
-        line.set_3d_properties(data[2, :num])
-    return lines
+        # Setting the axes properties
+        self.ax.set_xlim3d([0.0, 1.0])
+        self.ax.set_xlabel('X')
 
-# Attaching 3D axis to the figure
-fig = plt.figure()
-ax = p3.Axes3D(fig)
+        self.ax.set_ylim3d([0.0, 1.0])
+        self.ax.set_ylabel('Y')
 
-# Fifty lines of random 3-D lines
-data = [Gen_RandLine(25, 3) for index in range(50)]
+        self.ax.set_zlim3d([0.0, 1.0])
+        self.ax.set_zlabel('Z')
 
-# Creating fifty line objects.
-# NOTE: Can't pass empty arrays into 3d version of plot()
-lines = [ax.plot(dat[0, 0:1], dat[1, 0:1], dat[2, 0:1])[0] for dat in data]
+        self.ax.set_title('3D Test')
 
-# Setting the axes properties
-ax.set_xlim3d([0.0, 1.0])
-ax.set_xlabel('X')
+    def seek(self, frame_number):
+        pass
 
-ax.set_ylim3d([0.0, 1.0])
-ax.set_ylabel('Y')
+    def update(self, frame_number):
+        return update_lines(frame_number, self.points, self.lines)
 
-ax.set_zlim3d([0.0, 1.0])
-ax.set_zlabel('Z')
 
-ax.set_title('3D Test')
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--lines', type=int, default=50,
+                        help='number of random walks, default = 50')
+    parser.add_argument('-l', '--length', type=int, default=25,
+                        help='number of points of a walk (and of frames), default = 25')
+    args = parser.parse_args()
+    scene = Scene(args.lines, args.length)
 
-# Creating the Animation object
-line_ani = animation.FuncAnimation(fig, update_lines, 25, fargs=(data, lines),
-                                   interval=50, blit=False)
+    # Creating the Animation object
+    line_ani = animation.FuncAnimation(scene.fig, scene.update, args.length,
+                                       interval=50, blit=False)
 
-plt.show()
+    plt.show()